@@ -3,6 +3,17 @@
 # Created by the comments in source/py_gpio.c, in the RPi.GPIO package
 # available here -> https://pypi.python.org/pypi/RPi.GPIO
 # or here -> https://github.com/Tieske/rpi-gpio/blob/master/source/py_gpio.c
+#
+# Extended into an in-memory pin simulator: each channel keeps its direction,
+# pull and value, edge detection fires registered callbacks on a background
+# thread (honoring bouncetime) and wait_for_edge() blocks until an edge or a
+# timeout. Inputs are driven with set_input(), press() or play().
+import collections
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
 
 HIGH = 1
 LOW = 0
@@ -21,14 +32,134 @@ RISING = "Rising Edge"
 FALLING = "Falling Edge"
 BOTH = "Rising and Falling Edges"
 
+# Print every API call like the original mock did. Turn off when driving the
+# simulator at high rates so console output does not skew the timings.
+VERBOSE = True
+
+_lock = threading.RLock()
+_edge_cond = threading.Condition(_lock)
+_mode = None
+_warnings = True
+_channels = {}
+
+# (channel, monotonic time of the edge) waiting for the callback thread
+_pending = collections.deque()
+_pending_cond = threading.Condition(threading.Lock())
+_dispatcher = None
+
+# Seconds between an edge being generated and its callbacks returning
+latencies = collections.deque(maxlen=10000)
+
+
+class _Channel:
+    def __init__(self, direction, pull_up_down, value):
+        self.direction = direction
+        self.pull_up_down = pull_up_down
+        self.value = value
+        self.edge = None
+        self.callbacks = []
+        self.bouncetime = None
+        self.last_edge = None
+        self.detected = False
+        self.edges = 0
+
+
+def _log(message):
+    if VERBOSE:
+        LOG.info('%s', message)
+
+
+def _as_list(channels):
+    if isinstance(channels, (list, tuple)):
+        return list(channels)
+    return [channels]
+
+
+def _resting_value(pull_up_down):
+    return HIGH if pull_up_down == PUD_UP else LOW
+
+
+def _get_channel(channel):
+    try:
+        return _channels[channel]
+    except KeyError:
+        raise RuntimeError(
+            "You must setup() the GPIO channel {} first".format(channel))
+
+
+def _edge_matches(edge, old, new):
+    if old == new:
+        return False
+    if edge == BOTH:
+        return True
+    if edge == RISING:
+        return new == HIGH
+    return new == LOW
+
+
+def _dispatch_loop():
+    while True:
+        with _pending_cond:
+            while not _pending:
+                _pending_cond.wait()
+            channel, edge_time = _pending.popleft()
+        with _lock:
+            pin = _channels.get(channel)
+            callbacks = list(pin.callbacks) if pin else []
+        for callback in callbacks:
+            try:
+                callback(channel)
+            except Exception:  # pylint: disable=broad-except
+                LOG.exception('Callback %s on channel %s raised', callback,
+                              channel)
+        latencies.append(time.monotonic() - edge_time)
+
+
+def _queue_callbacks(channel, edge_time):
+    global _dispatcher
+    with _pending_cond:
+        if _dispatcher is None:
+            _dispatcher = threading.Thread(target=_dispatch_loop,
+                                           name='GPIOmock-callbacks',
+                                           daemon=True)
+            _dispatcher.start()
+        _pending.append((channel, edge_time))
+        _pending_cond.notify()
+
+
+def _set_value(channel, pin, value):
+    """ Change a pin value and fire edge detection. Caller holds _lock. """
+    old = pin.value
+    pin.value = value
+    now = time.monotonic()
+    if pin.edge is None or not _edge_matches(pin.edge, old, value):
+        _edge_cond.notify_all()
+        return
+    if (pin.bouncetime is not None and pin.last_edge is not None and
+            (now - pin.last_edge) * 1000 < pin.bouncetime):
+        return
+    pin.last_edge = now
+    pin.detected = True
+    pin.edges += 1
+    _edge_cond.notify_all()
+    if pin.callbacks:
+        _queue_callbacks(channel, now)
+
 
 # Clean up by resetting all GPIO channels that have been used by this program to INPUT
 #   with no pullup/pulldown and no event detection
 # [channel] - individual channel or list/tuple of channels to clean up.
 # Default - clean every channel that has been used."},
 def cleanup(channel=None):
-    print("Reset all GPIO channels (or channel {}) to INPUT with no pullup/pulldown and no event detection."
-          .format(channel))
+    _log("Reset all GPIO channels (or channel {}) to INPUT with no pullup/pulldown and no event detection."
+         .format(channel))
+    with _lock:
+        if channel is None:
+            _channels.clear()
+        else:
+            for ch in _as_list(channel):
+                _channels.pop(ch, None)
+        _edge_cond.notify_all()
 
 
 # Set up a GPIO channel or list of channels with a direction and (optional) pull/up down control
@@ -37,41 +168,71 @@ def cleanup(channel=None):
 # [pull_up_down] - PUD_OFF (default), PUD_UP or PUD_DOWN
 # [initial]      - Initial value for an output channel
 def setup(channels, direction, pull_up_down=PUD_OFF, initial=None):
-    print("Setup channel(s) {} for direction {}, with pull_up_down {} and set to initial value {}"
-          .format(channels, direction, pull_up_down, initial))
+    _log("Setup channel(s) {} for direction {}, with pull_up_down {} and set to initial value {}"
+         .format(channels, direction, pull_up_down, initial))
+    if _mode is None:
+        raise RuntimeError(
+            "Please set pin numbering mode using GPIO.setmode(GPIO.BOARD) "
+            "or GPIO.setmode(GPIO.BCM)")
+    with _lock:
+        for channel in _as_list(channels):
+            if direction == OUT:
+                value = LOW if initial is None else int(bool(initial))
+            else:
+                value = _resting_value(pull_up_down)
+            _channels[channel] = _Channel(direction, pull_up_down, value)
 
 
 # Output to a GPIO channel or list of channels
 # channel - either board pin number or BCM number depending on which mode is set.
 # value   - 0/1 or False/True or LOW/HIGH
 def output(channels, value):
-    print("Output a {} value to channel(s) {}".format(value, channels))
+    _log("Output a {} value to channel(s) {}".format(value, channels))
+    with _lock:
+        for channel in _as_list(channels):
+            pin = _get_channel(channel)
+            if pin.direction != OUT:
+                raise RuntimeError(
+                    "The GPIO channel has not been set up as an OUTPUT")
+            _set_value(channel, pin, int(bool(value)))
 
 
 # Input from a GPIO channel. Returns HIGH=1=True or LOW=0=False
 # channel - either board pin number or BCM number depending on which mode is set.
-def input(channel):
-    print("Returns the current input value (HIGH or LOW) of channel {}".format(channel))
+def input(channel):  # pylint: disable=redefined-builtin
+    with _lock:
+        return _get_channel(channel).value
 
 
 # Set up numbering mode to use for channels.
 # BOARD - Use Raspberry Pi board numbers
 # BCM   - Use Broadcom GPIO 00..nn numbers
 def setmode(mode):
-    print("Numbering style set to {} style".format(mode))
+    global _mode
+    _log("Numbering style set to {} style".format(mode))
+    if _mode is not None and mode != _mode:
+        raise ValueError("A different mode has already been set!")
+    _mode = mode
 
 
 # Get numbering mode used for channel numbers.
 # Returns BOARD, BCM or None
 def getmode():
-    print("Returns the numbering mode of BOARD, BCM or None")
+    return _mode
 
 
 # Add a callback for an event already defined using add_event_detect()
 # channel      - either board pin number or BCM number depending on which mode is set.
 # callback     - a callback function
 def add_event_callback(gpio, callback):
-    print("Also call {} when edge detected on channel {}".format(callback, gpio))
+    _log("Also call {} when edge detected on channel {}".format(callback, gpio))
+    with _lock:
+        pin = _get_channel(gpio)
+        if pin.edge is None:
+            raise RuntimeError(
+                "Add event detection using add_event_detect first before "
+                "adding a callback")
+        pin.callbacks.append(callback)
 
 
 # Enable edge detection events for a particular GPIO channel.
@@ -80,21 +241,45 @@ def add_event_callback(gpio, callback):
 # [callback]   - A callback function for the event (optional)
 # [bouncetime] - Switch bounce timeout in ms for callback
 def add_event_detect(gpio, edge, callback=None, bouncetime=None):
-    print("Added event detection to PIN {} on edge {}. Call {} with minimal bounce time of {}."
-          .format(gpio, edge, callback, bouncetime))
+    _log("Added event detection to PIN {} on edge {}. Call {} with minimal bounce time of {}."
+         .format(gpio, edge, callback, bouncetime))
+    with _lock:
+        pin = _get_channel(gpio)
+        if pin.direction != IN:
+            raise RuntimeError("You must setup() the GPIO channel as an "
+                               "input first")
+        if pin.edge is not None:
+            raise RuntimeError("Conflicting edge detection already enabled "
+                               "for this GPIO channel")
+        pin.edge = edge
+        pin.bouncetime = bouncetime
+        pin.last_edge = None
+        pin.detected = False
+        if callback is not None:
+            pin.callbacks.append(callback)
 
 
 # Remove edge detection for a particular GPIO channel
 # channel - either board pin number or BCM number depending on which mode is set.
 def remove_event_detect(gpio):
-    print("Edge detection removed for GPIO channel {}".format(gpio))
+    _log("Edge detection removed for GPIO channel {}".format(gpio))
+    with _lock:
+        pin = _get_channel(gpio)
+        pin.edge = None
+        pin.callbacks = []
+        pin.detected = False
+        _edge_cond.notify_all()
 
 
 # Returns True if an edge has occurred on a given GPIO.
 # You need to enable edge detection using add_event_detect() first.
 # channel - either board pin number or BCM number depending on which mode is set.
 def event_detected(channel):
-    print("An event was detected on channel {}".format(channel))
+    with _lock:
+        pin = _get_channel(channel)
+        detected = pin.detected
+        pin.detected = False
+        return detected
 
 
 # Wait for an edge.  Returns the channel number or None on timeout.
@@ -103,25 +288,125 @@ def event_detected(channel):
 # [bouncetime] - time allowed between calls to allow for switch-bounce
 # [timeout]    - timeout in ms
 def wait_for_edge(channel, edge, bouncetime=None, timeout=None):
-    print("Waiting for edge {} on channel {}, with a minimal time between calls of {} and a timeout of {}."
-          .format(channel, edge, bouncetime, timeout))
+    _log("Waiting for edge {} on channel {}, with a minimal time between calls of {} and a timeout of {}."
+         .format(channel, edge, bouncetime, timeout))
+    with _lock:
+        pin = _get_channel(channel)
+        if pin.edge is not None and pin.callbacks:
+            raise RuntimeError("Conflicting edge detection events already "
+                               "exist for this GPIO channel")
+        temporary = pin.edge is None
+        if temporary:
+            pin.edge = edge
+            pin.bouncetime = bouncetime
+        seen = pin.edges
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout / 1000.0
+        try:
+            while _channels.get(channel) is pin and pin.edges == seen:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                _edge_cond.wait(remaining)
+            if _channels.get(channel) is not pin:
+                return None
+            pin.detected = False
+            return channel
+        finally:
+            if temporary:
+                pin.edge = None
 
 
 # Return the current GPIO function (IN, OUT, PWM, SERIAL, I2C, SPI)
 # channel - either board pin number or BCM number depending on which mode is set.
 def gpio_function(channel):
-    print("Returns the current GPIO function for channel {}".format(channel))
+    with _lock:
+        pin = _channels.get(channel)
+        return pin.direction if pin else IN
 
 
 # Enable or disable warning messages
 def setwarnings(state):
-    print("Set warnings to {}".format(state))
+    global _warnings
+    _log("Set warnings to {}".format(state))
+    _warnings = bool(state)
 
 
 def PWM(channel, frequency):
     return PwmMock(channel, frequency)
 
 
+# Drive an input channel to a value as if it were wired to external hardware.
+# Fires edge detection, callbacks and wakes wait_for_edge() as appropriate.
+def set_input(channel, value):
+    with _lock:
+        pin = _get_channel(channel)
+        if pin.direction != IN:
+            raise RuntimeError("The GPIO channel has not been set up as an "
+                               "INPUT")
+        _set_value(channel, pin, int(bool(value)))
+
+
+# Simulate a momentary push button wired against the channel's pull resistor:
+# drive it to the active level for `duration` seconds then release it.
+def press(channel, duration=0.05):
+    with _lock:
+        resting = _resting_value(_get_channel(channel).pull_up_down)
+    set_input(channel, 1 - resting)
+    if duration:
+        time.sleep(duration)
+    set_input(channel, resting)
+
+
+# Replay a scripted input feed. `script` is an iterable of
+# (delay_seconds, channel) button presses or (delay_seconds, channel, value)
+# raw level changes, each delay measured from the previous step.
+# `duration` is how long each button press is held. Runs on a background
+# thread unless block is True; returns the thread (or None when blocking).
+def play(script, duration=0.0, block=False):
+    steps = list(script)
+
+    def _run():
+        next_step = time.monotonic()
+        for step in steps:
+            next_step += step[0]
+            delay = next_step - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if len(step) == 2:
+                press(step[1], duration)
+            else:
+                set_input(step[1], step[2])
+
+    if block:
+        _run()
+        return None
+    thread = threading.Thread(target=_run, name='GPIOmock-play', daemon=True)
+    thread.start()
+    return thread
+
+
+# Summarise callback latencies recorded so far, in milliseconds.
+# Returns a dict with count, min, mean, max and 99th percentile.
+def latency_stats(reset=False):
+    samples = sorted(latencies)
+    if reset:
+        latencies.clear()
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'min': samples[0] * 1000,
+        'mean': sum(samples) / len(samples) * 1000,
+        'max': samples[-1] * 1000,
+        'p99': samples[min(len(samples) - 1,
+                           int(len(samples) * 0.99))] * 1000,
+    }
+
+
 # Prints information about your Raspberry Pi
 RPI_INFO = "{'P1_REVISION': -1, 'RAM': '-1M', 'REVISION': '-1', 'TYPE': 'Pi Model', 'PROCESSOR': 'Some Processor', 'MANUFACTURER': 'Some Mfr'}"
 
@@ -135,14 +420,13 @@ class PwmMock:
     def __init__(self, channel, frequency):
         global p_channel
         p_channel = channel
-        print("New instance of class created: {}. Enables pulse-width modulation on channel {} at frequency {}".format(self, channel, frequency))
+        LOG.info('New instance of class created: %s. Enables pulse-width modulation on channel %s at frequency %s', self, channel, frequency)
 
     def start(self, frequency):
-        print("Start pulse-width modulation at {} for channel {}".format(frequency, p_channel))
+        LOG.info('Start pulse-width modulation at %s for channel %s', frequency, p_channel)
 
     def ChangeDutyCycle(self, frequency):
-        print("Set pulse-width modulation to {} for channel {}".format(frequency, p_channel))
+        LOG.info('Set pulse-width modulation to %s for channel %s', frequency, p_channel)
 
     def stop(self):
-        print("Stop pulse-width modulation on channel {}".format(p_channel))
-
+        LOG.info('Stop pulse-width modulation on channel %s', p_channel)
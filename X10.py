@@ -1,7 +1,10 @@
 
+import logging
 import struct
 import time
 
+LOG = logging.getLogger(__name__)
+
 # Header Byte Types
 addr = 0x04
 func = 0x06
@@ -69,10 +72,7 @@ unitcode = {
 # bytes and then returning the bitwise AND with 0xFF.
 #==============================================================
 def X10_Checksum( s ):
-	sum = 0
-	for c in s:
-		sum = sum + ord(c)
-	return sum & 0xFF
+	return sum( bytearray( s ) ) & 0xFF
 
 
 # Send a string to the X10 CM11a module.  The module replys with
@@ -90,17 +90,17 @@ def X10_Send( ser, s ):
 	cs = X10_Checksum( s )	# Compute checksum of the bytes.
 
 	if (len(c) == 1) and (ord(c) == cs):	# Good Checksum
-		ser.write( chr(0x00) )		# Send ACK
+		ser.write( b'\x00' )		# Send ACK
 		c = ser.read(1)			# Look for X10 ready.
 		if (len(c) == 1) and (ord(c) == 0x55):
 			ret = True		# All Good
 		else:
-			print "Err: Missing X10 ready response."
+			LOG.error('Missing X10 ready response.')
 			ret = False
 	else:
-		print "Checksum Err / Len = %d" % len(c)
+		LOG.error('X10 checksum error, %d bytes read.', len(c))
 		if len(c) == 1:
-			print "Checksum -> %x expecting %x" % (ord(c), cs)
+			LOG.error('X10 checksum %x, expecting %x.', ord(c), cs)
 		ret = False
 
 	return ret	# Return True on Good & False on Bad
@@ -114,12 +114,12 @@ def X10_On( ser, h, u ):
 	b = struct.pack( 'BB', addr, (h << 4 ) | (u & 0x0F) )
 	#print "0x%x 0x%x" % struct.unpack('BB', b)
 	if X10_Send( ser, b ) == False:
-		print 'X10 Error send first ON string.'
+		LOG.error('X10 Error send first ON string.')
 		return False
 	b = struct.pack( 'BB', func, (h << 4 ) | funccode['On'] )
 	#print "0x%x 0x%x" % struct.unpack('BB', b)
 	if X10_Send( ser, b ) == False:
-		print 'X10 Error send second ON string.'
+		LOG.error('X10 Error send second ON string.')
 		return False
 
 	return True	# Everything must be OK.
@@ -131,12 +131,12 @@ def X10_Off( ser, h, u ):
 	b = struct.pack( 'BB', addr, (h << 4 ) | (u & 0x0F) )
 	#print "0x%x 0x%x" % struct.unpack('BB', b)
 	if X10_Send( ser, b ) == False:
-		print 'X10 Error send first OFF string.'
+		LOG.error('X10 Error send first OFF string.')
 		return False
 	b = struct.pack( 'BB', func, (h << 4 ) | funccode['Off'] )
 	#print "0x%x 0x%x" % struct.unpack('BB', b)
 	if X10_Send( ser, b ) == False:
-		print 'X10 Error send second OFF string.'
+		LOG.error('X10 Error send second OFF string.')
 		return False
 
 	return True	# Everything must be OK.
@@ -150,13 +150,13 @@ def X10_Bright( ser, h, u ):
 	b = struct.pack( 'BB', addr, (h << 4 ) | (u & 0x0F) )
 	#print "0x%x 0x%x" % struct.unpack('BB', b)
 	if X10_Send( ser, b ) == False:
-		print 'X10 Error send first Bright string.'
+		LOG.error('X10 Error send first Bright string.')
 		ret = False
 	if ret == True:
 		b = struct.pack( 'BB', fullBright, (h << 4 ) | funccode['Bright'] )
 		#print "0x%x 0x%x" % struct.unpack('BB', b)
 		if X10_Send( ser, b ) == False:
-			print 'X10 Error send second Bright string.'
+			LOG.error('X10 Error send second Bright string.')
 			ret = False
 
 	ser.timeout = to	# Restore timeout to orginal value.
@@ -174,25 +174,20 @@ def X10_Status( ser ):
 
 	ser.flushInput()
 	time.sleep( 0.1 )
-	ser.write( chr(0x8b) )
+	ser.write( b'\x8b' )
 	c = ser.read( 14 )	# The module should return 14 bytes of info.
 	if len(c) >= 13:
-		i = 0
-		for a in c: 
-			print "%d : %s" % ( i, hex(ord(a)) )
-			i = i + 1
-		print 'X10 status OK.'
+		for i, a in enumerate(c):
+			LOG.debug('%d : %s', i, hex(a))
+		LOG.info('X10 status OK.')
 		ret = True
 	else:
-		print 'X10 status is BAD.'
-		print 'X10 string len: ' + str(len(c))
-		i = 0
-		for a in c: 
-			print "%d : %s" % ( i, hex(ord(a)) )
-			i = i + 1
+		LOG.error('X10 status is BAD, string len: %d', len(c))
+		for i, a in enumerate(c):
+			LOG.error('%d : %s', i, hex(a))
 		ret = False
 
-	ser.write( chr(0x00) )	# Send an ACK.
+	ser.write( b'\x00' )	# Send an ACK.
 	ser.timeout = to	# Restore timeout value.
 	return (ret, c)
 
@@ -210,20 +205,19 @@ def X10_SetClock( ser ):
 	time.sleep( 0.5 )	# Wait a bit after getting a 0xA5.
 	ser.flushInput()
 	ser.write( s )
-	print 'Reseting X10 clock.'
+	LOG.info('Reseting X10 clock.')
 	c = ser.read(1)		# Readback checksum.
 	cs = X10_Checksum( s[1:] )
 	if (len(c) == 1) and (ord(c) == cs):
-		ser.write( chr(0x00) )
+		ser.write( b'\x00' )
 		c = ser.read( 1 )
 		if (len(c) == 1) and (ord(c) == 0x55):
-			print 'X10 Clock set.'
+			LOG.info('X10 Clock set.')
 		else:
-			print 'X10 final 0x55 marker missing.'
+			LOG.error('X10 final 0x55 marker missing.')
 	else:
-		ser.write( chr(0x00) )
-		print 'Bad checksum from X10 interface.'
-		print 'X10 returned: ' + hex(ord(c))
-		print 'Expected Checksum: ' + hex(cs)
+		ser.write( b'\x00' )
+		LOG.error('Bad checksum from X10 interface: returned %s, expected %s',
+			  hex(ord(c)) if len(c) == 1 else None, hex(cs))
 
 
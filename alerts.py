@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+""" Severe weather alerts from the Dark Sky response. """
+import collections
+import logging
+import threading
+import time
+
+import X10
+
+LOG = logging.getLogger(__name__)
+
+# Dark Sky severities, least to most severe
+SEVERITIES = ('advisory', 'watch', 'warning')
+
+Alert = collections.namedtuple(
+    'Alert', 'id title severity time expires regions description uri')
+
+
+def extract(weather, now=None):
+    """
+    Pull the unexpired alerts out of a forecast, most severe first. Dark
+    Sky alerts have no id of their own, so the id is the alert's uri (or
+    its title and start time when there is no uri). Duplicates keep the
+    latest expiry.
+    """
+    if now is None:
+        now = time.time()
+    found = {}
+    for alert in getattr(weather, 'alerts', None) or []:
+        title = getattr(alert, 'title', '') or 'Weather alert'
+        issued = getattr(alert, 'time', None) or now
+        expires = getattr(alert, 'expires', None)
+        if expires is not None and expires <= now:
+            continue
+        severity = getattr(alert, 'severity', 'advisory')
+        if severity not in SEVERITIES:
+            severity = 'advisory'
+        alert_id = getattr(alert, 'uri', None) or '{0}@{1}'.format(
+            title, int(issued))
+        previous = found.get(alert_id)
+        if previous is not None and (previous.expires or 0) >= (expires or 0):
+            continue
+        found[alert_id] = Alert(
+            alert_id, title, severity, issued, expires,
+            tuple(getattr(alert, 'regions', None) or ()),
+            (getattr(alert, 'description', '') or '').strip(),
+            getattr(alert, 'uri', None))
+    return sorted(found.values(), reverse=True,
+                  key=lambda alert: (SEVERITIES.index(alert.severity),
+                                     alert.time))
+
+
+class AlertTracker:
+    """
+    Remembers which alerts have been seen so each one interrupts the
+    display only once. `update` is called with every new forecast; the
+    main loop only has to look at `pending`.
+    """
+
+    def __init__(self, min_severity='watch', lamp=None):
+        if min_severity not in SEVERITIES:
+            raise ValueError('ALERT_MIN_SEVERITY must be one of {}'.format(
+                ', '.join(SEVERITIES)))
+        self.min_severity = min_severity
+        self.lamp = lamp
+        self.active = []
+        self.seen = {}
+        self.pending = False
+
+    def is_urgent(self, alert):
+        return SEVERITIES.index(alert.severity) >= \
+            SEVERITIES.index(self.min_severity)
+
+    def update(self, active, now=None):
+        """ Take the alerts from a new forecast. Returns the new ones. """
+        if now is None:
+            now = time.time()
+        # Forget alerts once they've expired, so a reissue is news again
+        self.seen = dict((alert_id, expires)
+                         for alert_id, expires in self.seen.items()
+                         if expires is None or expires > now)
+        new = [alert for alert in active
+               if alert.id not in self.seen
+               or (alert.expires or 0) > (self.seen[alert.id] or 0)]
+        for alert in active:
+            self.seen[alert.id] = alert.expires
+        self.active = active
+        for alert in new:
+            LOG.info('Weather alert: %s (%s)', alert.title, alert.severity)
+        if any(self.is_urgent(alert) for alert in new):
+            self.pending = True
+        if self.lamp is not None:
+            self.lamp.switch(any(self.is_urgent(alert) for alert in active))
+        return new
+
+    def take(self):
+        """ True once after an urgent new alert arrives. """
+        pending, self.pending = self.pending, False
+        return pending
+
+
+class X10Lamp:
+    """
+    An X10 lamp module, switched through a CM11A on a serial port while
+    urgent alerts are active. Serial commands can take a couple of seconds,
+    so they are sent from a thread. Needs pyserial.
+    """
+
+    def __init__(self, port, house='A', unit='1'):
+        self.port = port
+        self.house = X10.housecode[house.upper()]
+        self.unit = X10.unitcode[str(unit)]
+        self.state = None
+        self.lock = threading.Lock()
+
+    def switch(self, on):
+        if on == self.state:
+            return
+        self.state = on
+        threading.Thread(target=self._send, args=(on,), daemon=True).start()
+
+    def _send(self, on):
+        try:
+            import serial
+        except ImportError:
+            LOG.error('pyserial is needed to switch X10 lights.')
+            return
+        with self.lock:
+            try:
+                with serial.Serial(self.port, 4800, timeout=2) as ser:
+                    if on:
+                        X10.X10_On(ser, self.house, self.unit)
+                    else:
+                        X10.X10_Off(ser, self.house, self.unit)
+            except serial.SerialException as e:
+                LOG.error('Unable to switch X10 light on %s: %s',
+                          self.port, e)
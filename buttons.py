@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+""" GPIO push buttons that switch display modes. """
+import logging
+import threading
+
+import pygame
+
+LOG = logging.getLogger(__name__)
+
+try:
+    import RPi.GPIO as GPIO
+except (ImportError, RuntimeError):
+    # Not on a Pi (or no access to /dev/gpiomem): use the simulator
+    import GPIOmock as GPIO
+
+
+class Buttons:
+    """
+    Maps GPIO channels (BCM numbering) to the same keys the keyboard uses.
+    Presses are detected by edge-detect callbacks, which post a KEYDOWN
+    event into the pygame queue and wake the main loop straight away
+    instead of waiting for its next tick.
+    """
+
+    def __init__(self, pins=None, bouncetime=200):
+        self.pins = {}
+        for channel, key in (pins or {}).items():
+            key_code = getattr(pygame, 'K_{}'.format(key), None)
+            if key_code is None:
+                raise ValueError(
+                    'GPIO_BUTTONS: unknown key {!r} for channel {}'.format(
+                        key, channel))
+            self.pins[channel] = key_code
+        self.bouncetime = bouncetime
+        self.wake_event = threading.Event()
+        self.started = False
+
+    def start(self):
+        if not self.pins:
+            return
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        for channel in self.pins:
+            # Buttons short the pin to ground, so idle high and press low
+            GPIO.setup(channel, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(channel, GPIO.FALLING,
+                                  callback=self._pressed,
+                                  bouncetime=self.bouncetime)
+        self.started = True
+        LOG.info('Listening for buttons on GPIO %s',
+                 ', '.join(str(channel) for channel in sorted(self.pins)))
+
+    def stop(self):
+        if self.started:
+            GPIO.cleanup(list(self.pins))
+            self.started = False
+
+    def _pressed(self, channel):
+        # Runs on the GPIO callback thread; pygame.event.post is thread safe.
+        pygame.event.post(pygame.event.Event(
+            pygame.KEYDOWN, key=self.pins[channel], mod=0, gpio=channel))
+        self.wake()
+
+    def wake(self):
+        self.wake_event.set()
+
+    def wait(self, timeout):
+        """
+        Sleep for up to `timeout` seconds, returning early as soon as a
+        button is pressed. Returns True if woken by a button.
+        """
+        woken = self.wake_event.wait(timeout)
+        self.wake_event.clear()
+        return woken
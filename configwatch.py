@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+""" Notices edits to config.py while the display is running. """
+import importlib.util
+import logging
+import os
+import threading
+
+LOG = logging.getLogger(__name__)
+
+# Stands in for a setting that was deleted from the file
+REMOVED = object()
+
+
+def settings(module):
+    """ The module's settings: its upper case names. """
+    return {name: value for name, value in vars(module).items()
+            if name.isupper()}
+
+
+def update(module, changes):
+    """ Apply changes from ConfigWatcher.take() to the settings module. """
+    for name, value in changes.items():
+        if value is REMOVED:
+            if hasattr(module, name):
+                delattr(module, name)
+        else:
+            setattr(module, name, value)
+
+
+class ConfigWatcher:
+    """
+    Checks the modification time of a settings module's file every
+    `interval` seconds on a background thread. A changed file is run into
+    a fresh module, so the live settings are never half replaced and a
+    typo can't take the display down, then passed to `validate`, which
+    returns a list of problems. Only a file with none is accepted; the
+    settings that differ wait in `pending` until the main loop take()s
+    them and applies them all at once between frames, or reject()s them
+    if that fails.
+    """
+
+    def __init__(self, module, interval=5, validate=None):
+        self.module = module
+        self.path = module.__file__
+        self.interval = interval
+        self.validate = validate
+        self.accepted = settings(module)
+        self.stamp = self._stamp()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._watch, name='config',
+                                       daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def load(self):
+        spec = importlib.util.spec_from_file_location(
+            self.module.__name__, self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return settings(module)
+
+    def check(self):
+        """ Load the file if it changed; True if new settings are pending. """
+        stamp = self._stamp()
+        if stamp is None or stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        try:
+            new = self.load()
+        except Exception as e:
+            LOG.error('Ignoring %s, it failed to load: %s: %s',
+                      self.path, type(e).__name__, e)
+            return False
+        problems = self.validate(new) if self.validate else []
+        if problems:
+            for problem in problems:
+                LOG.error('Ignoring %s: %s', self.path, problem)
+            return False
+        with self.lock:
+            changes = {name: value for name, value in new.items()
+                       if self.accepted.get(name, REMOVED) != value}
+            changes.update((name, REMOVED) for name in self.accepted
+                           if name not in new)
+            self.accepted = new
+            self.pending.update(changes)
+        return bool(changes)
+
+    def take(self):
+        """ Settings changed since the last call, as {name: new value}. """
+        with self.lock:
+            changes, self.pending = self.pending, {}
+        return changes
+
+    def reject(self, changes):
+        """
+        Forget changes from take() that couldn't be applied after all, so
+        the settings module keeps its values and the next edit of them is
+        picked up as a change again.
+        """
+        with self.lock:
+            for name in changes:
+                value = getattr(self.module, name, REMOVED)
+                if value is REMOVED:
+                    self.accepted.pop(name, None)
+                else:
+                    self.accepted[name] = value
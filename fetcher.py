@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+""" Fetches forecasts with typed errors, backoff and a circuit breaker. """
+import logging
+import random
+import time
+
+import requests
+
+LOG = logging.getLogger(__name__)
+
+
+class FetchError(Exception):
+    """ Base class for everything that can go wrong getting a forecast. """
+
+
+class NetworkError(FetchError):
+    """ Couldn't reach Dark Sky: DNS, connection refused, timeout... """
+
+
+class HTTPStatusError(FetchError):
+    """ Dark Sky answered with something other than 200 OK. """
+
+
+class DecodeError(FetchError):
+    """ The response body wasn't valid JSON. """
+
+
+class InvalidDataError(FetchError):
+    """ The response was JSON but lacks data the display needs. """
+
+
+# Fields the display reads from each part of the response
+CURRENTLY_FIELDS = ('temperature', 'apparentTemperature', 'humidity',
+                    'windSpeed', 'summary', 'icon')
+DAILY_FIELDS = ('time', 'sunriseTime', 'sunsetTime', 'temperatureLow',
+                'temperatureHigh', 'precipProbability', 'icon')
+HOURLY_FIELDS = ('time', 'temperature', 'precipProbability', 'icon')
+
+
+def validate(weather):
+    """ Raise InvalidDataError unless `weather` has everything we draw. """
+    try:
+        currently = weather.currently
+        daily = weather.daily.data
+        hourly = weather.hourly.data
+    except AttributeError as e:
+        raise InvalidDataError('Response is missing a block: {}'.format(e))
+    if len(daily) < 4 or len(hourly) < 4:
+        raise InvalidDataError('Response has {} days and {} hours, need '
+                               '4 of each'.format(len(daily), len(hourly)))
+    for name, points, fields in (('currently', [currently], CURRENTLY_FIELDS),
+                                 ('daily', daily[:4], DAILY_FIELDS),
+                                 ('hourly', hourly[:4], HOURLY_FIELDS)):
+        for point in points:
+            missing = [field for field in fields
+                       if not hasattr(point, field)]
+            if missing:
+                raise InvalidDataError('{} data is missing {}'.format(
+                    name, ', '.join(missing)))
+
+
+class ForecastFetcher:
+    """
+    Wraps the forecast request in a small state machine:
+
+      closed    - normal; after a failure the next attempt waits an
+                  exponential, jittered backoff. `retries` consecutive
+                  failures open the circuit.
+      open      - no requests at all for `cooldown` seconds (doubling on
+                  each re-open, up to `max_cooldown`).
+      half-open - one trial request; success closes the circuit, failure
+                  opens it again.
+
+    `request` returns the forecast and `process`, if given, derives
+    whatever else the caller needs from a forecast that validated.
+    Exceptions from the request and validation are translated into the
+    FetchError subclasses above; anything else, including any exception
+    from `process`, is a bug and is left to propagate.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, request, process=None, retries=4, backoff=60,
+                 max_backoff=900, cooldown=900, max_cooldown=3600):
+        self.request = request
+        self.process = process
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.next_attempt = 0
+        self.last_error = None
+
+    def ready(self, now=None):
+        """ True if a request may be made now. """
+        if now is None:
+            now = time.time()
+        if now < self.next_attempt:
+            return False
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+            LOG.info('Forecast circuit half-open, trying one request.')
+        return True
+
+    def fetch(self):
+        """
+        Make the request, returning the validated forecast (or what
+        `process` made of it).
+        """
+        try:
+            weather = self.request()
+            validate(weather)
+        except FetchError as e:
+            self._failed(e)
+            raise
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
+            raise self._failed(NetworkError(str(e)))
+        except requests.exceptions.RequestException as e:
+            raise self._failed(HTTPStatusError(str(e)))
+        except ValueError as e:  # includes simplejson.decoder.JSONDecodeError
+            raise self._failed(DecodeError(str(e)))
+        except (AttributeError, KeyError, IndexError, TypeError) as e:
+            raise self._failed(InvalidDataError(str(e)))
+        # The request worked, whatever becomes of the data. Outside the
+        # try: a bug here must not pass for bad data, open the circuit or
+        # spend the budget on retries
+        self.succeeded()
+        if self.process is not None:
+            weather = self.process(weather)
+        return weather
+
+    def succeeded(self):
+        if self.state != self.CLOSED:
+            LOG.info('Forecast circuit closed, requests are working again.')
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self.next_attempt = 0
+        self.last_error = None
+
+    def _failed(self, error):
+        self.failures += 1
+        self.last_error = error
+        now = time.time()
+        if self.state == self.HALF_OPEN or self.failures >= self.retries:
+            if self.state == self.HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self.state = self.OPEN
+            self.next_attempt = now + self.cooldown
+            LOG.warning('Forecast circuit open after %d failures, pausing '
+                        'requests for %d seconds.', self.failures,
+                        self.cooldown)
+        else:
+            delay = min(self.max_backoff,
+                        self.backoff * 2 ** (self.failures - 1))
+            # Jitter so a fleet of displays doesn't retry in lockstep
+            self.next_attempt = now + random.uniform(delay / 2, delay)
+        return error
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+""" Finds the TTF file for a font name without pygame's system font scan. """
+import glob
+import json
+import logging
+import os
+
+import pygame
+
+LOG = logging.getLogger(__name__)
+
+# pygame ships FreeSans Bold, the face the display is designed around
+PYGAME_FONT = os.path.join(os.path.dirname(pygame.__file__),
+                           pygame.font.get_default_font())
+
+
+class FontResolver:
+    """
+    Resolves a font name to a file, in order:
+      1. `font_file`, if configured
+      2. a file in `font_dir` whose name starts with the font name
+      3. pygame's own freesansbold.ttf, for 'freesans'
+      4. the path saved in `cache_path` by an earlier run
+      5. pygame.font.match_font, which enumerates the system fonts (slow
+         on an SD card), saving the answer to `cache_path`
+      6. pygame's default font
+    so the scan happens at most once per machine, if at all.
+    """
+
+    def __init__(self, font_file=None, font_dir='fonts',
+                 cache_path='font_paths.json'):
+        self.font_file = font_file
+        self.font_dir = font_dir
+        self.cache_path = cache_path
+        self.paths = {}
+        self.cached = self.load()
+
+    def load(self):
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path) as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        return cached if isinstance(cached, dict) else {}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        temp_path = self.cache_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as cache_file:
+                json.dump(self.cached, cache_file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            LOG.warning('Unable to save font paths: %s', e)
+
+    def resolve(self, name):
+        path = self.paths.get(name)
+        if path is None:
+            path = self.paths[name] = self._find(name)
+            LOG.info('Font %s: %s', name, path)
+        return path
+
+    def _find(self, name):
+        if self.font_file:
+            return self.font_file
+        if self.font_dir:
+            # Prefer a bold face, e.g. FreeSansBold.ttf over FreeSans.ttf
+            candidates = sorted(
+                glob.glob(os.path.join(self.font_dir, '*.[to]tf')),
+                key=lambda path: 'bold' not in path.lower())
+            for path in candidates:
+                if os.path.basename(path).lower().startswith(name.lower()):
+                    return path
+        if name.lower() == 'freesans' and os.path.exists(PYGAME_FONT):
+            return PYGAME_FONT
+        path = self.cached.get(name)
+        if path and os.path.exists(path):
+            return path
+        path = pygame.font.match_font(name, bold=True)
+        if path:
+            self.cached[name] = path
+            self.save()
+            return path
+        return PYGAME_FONT
+
+
+class OpaqueFont(pygame.font.Font):
+    """
+    A Font that renders onto a solid `background` and converts the result
+    to the display's pixel format, so blitting text is a straight copy
+    instead of a per-pixel alpha blend. Only for text drawn over that
+    colour; needs the display mode to be set.
+    """
+
+    background = (0, 0, 0)
+
+    def render(self, text, antialias, color, background=None):
+        if background is None:
+            background = self.background
+        return super().render(text, antialias, color, background).convert()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+""" Paces how often the display is redrawn. """
+import logging
+import math
+import time
+
+LOG = logging.getLogger(__name__)
+
+# Slowest rate the governor will fall back to: one frame per minute, which
+# is all a clock without seconds needs.
+MINUTE_FPS = 1 / 60.0
+
+
+class FrameGovernor:
+    """
+    Decides when the next frame is due. Frames are aligned to the wall
+    clock (every second at 1 fps, on the minute at MINUTE_FPS) so the clock
+    never shows a stale time for longer than one frame period.
+
+    With `adaptive` set, the average frame cost is compared against
+    `cpu_budget`, the fraction of wall time rendering may use. The rate is
+    halved while it is over budget, down to 1 fps and then to MINUTE_FPS,
+    and doubled back towards `target_fps` once there is room for it.
+
+    While something moves on screen, like scrolling text, hold() keeps the
+    rate up to a minimum whatever the target, as far as the budget allows.
+    """
+
+    def __init__(self, target_fps=1.0, cpu_budget=0.25, adaptive=True):
+        if target_fps <= 0:
+            raise ValueError('TARGET_FPS must be greater than 0')
+        self.target_fps = float(target_fps)
+        self.cpu_budget = cpu_budget
+        self.adaptive = adaptive
+        self.fps = self.target_fps
+        self.frame_cost = None
+        self.last_frame = None
+        self.floor = 0.0
+
+    @property
+    def rate(self):
+        """ Frames per second being drawn, counting any hold(). """
+        floor = self.floor
+        if self.adaptive and self.frame_cost:
+            floor = min(floor, self.cpu_budget / self.frame_cost)
+        return max(self.fps, floor)
+
+    @property
+    def period(self):
+        return 1.0 / self.rate
+
+    @property
+    def shows_seconds(self):
+        """ False when frames are too far apart for a seconds display. """
+        return self.rate >= 1.0
+
+    def hold(self, fps):
+        """ Draw at least `fps` frames a second, until hold(0). """
+        if fps != self.floor:
+            self.floor = float(fps)
+            self.last_frame = None
+
+    def _frame_index(self, now):
+        return math.floor(now / self.period)
+
+    def due(self, now=None):
+        """ True if a frame should be drawn now. """
+        if now is None:
+            now = time.time()
+        index = self._frame_index(now)
+        if index == self.last_frame:
+            return False
+        self.last_frame = index
+        return True
+
+    def time_to_next_frame(self, now=None):
+        if now is None:
+            now = time.time()
+        return max(0.0, (self._frame_index(now) + 1) * self.period - now)
+
+    def force(self):
+        """ Make the next call to due() return True, e.g. on mode change. """
+        self.last_frame = None
+
+    def frame_done(self, seconds):
+        """ Record how long a frame took and adjust the rate if needed. """
+        if self.frame_cost is None:
+            self.frame_cost = seconds
+        else:
+            # Exponential moving average so one slow frame doesn't count
+            self.frame_cost += (seconds - self.frame_cost) * 0.2
+        if not self.adaptive:
+            return
+        load = self.frame_cost * self.fps
+        if load > self.cpu_budget and self.fps > MINUTE_FPS:
+            self._set_fps(self.fps / 2 if self.fps > 1 else MINUTE_FPS)
+        elif self.fps < self.target_fps:
+            faster = 1.0 if self.fps < 1 else min(self.fps * 2,
+                                                  self.target_fps)
+            # Only speed up if the faster rate would use at most half the
+            # budget, so the rate doesn't flap around the limit
+            if self.frame_cost * faster <= self.cpu_budget / 2:
+                self._set_fps(faster)
+
+    def _set_fps(self, fps):
+        LOG.info('Frame rate %.3g -> %.3g fps (frame cost %.1f ms)',
+                 self.fps, fps, self.frame_cost * 1000)
+        self.fps = fps
+        self.last_frame = None
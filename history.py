@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+""" Keeps a local history of observed conditions for the trend screen. """
+import sqlite3
+import threading
+import time
+
+import units
+
+# Column name -> attribute of the Dark Sky `currently` block
+FIELDS = {
+    'temperature': 'temperature',
+    'humidity': 'humidity',
+    'wind_speed': 'windSpeed',
+    'pressure': 'pressure',
+    'precip_probability': 'precipProbability',
+}
+
+
+# PRAGMA user_version of a file storing SI units. Files from before were
+# version 0 and stored whatever UNITS was set to.
+SI_VERSION = 1
+
+
+def scaled(column, scale, offset):
+    return '{0} * {1!r} + {2!r}'.format(column, scale, offset)
+
+
+class History:
+    """
+    Append-only SQLite store of current conditions, one row per fetch.
+    Rows older than `raw_days` are folded into hourly averages, and hourly
+    rows older than `days` are dropped, so the file stays small however
+    long the display runs. Values are stored in SI units, whatever the
+    display shows, so changing UNITS never mixes units in one column;
+    a file written by an older version, in `legacy_units`, is converted
+    once when opened.
+    """
+
+    def __init__(self, path='history.sqlite', days=30, raw_days=2,
+                 legacy_units=units.CANONICAL):
+        self.days = days
+        self.raw_days = raw_days
+        self.lock = threading.Lock()
+        self.next_compact = 0
+        # Written by the fetch and read by the frame builder thread
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        columns = ', '.join('{} REAL'.format(name) for name in FIELDS)
+        with self.lock, self.db:
+            for table in ('samples', 'hourly'):
+                self.db.execute(
+                    'CREATE TABLE IF NOT EXISTS {} (time INTEGER PRIMARY '
+                    'KEY, {})'.format(table, columns))
+            version = self.db.execute('PRAGMA user_version').fetchone()[0]
+            if version < SI_VERSION:
+                changes = self.conversions(legacy_units, units.CANONICAL)
+                if changes:
+                    for table in ('samples', 'hourly'):
+                        self.db.execute('UPDATE {} SET {}'.format(
+                            table, ', '.join(changes)))
+                self.db.execute('PRAGMA user_version = {}'.format(
+                    SI_VERSION))
+
+    @staticmethod
+    def conversions(source, target):
+        """ SQL assignments converting the columns between unit systems. """
+        table = units.field_table(source, target)
+        return ['{0} = {1}'.format(column, scaled(column, *table[attribute]))
+                for column, attribute in FIELDS.items()
+                if attribute in table]
+
+    def record(self, weather):
+        """ Append the `currently` block of a forecast, in SI units. """
+        table = units.field_table(units.current_units(weather),
+                                  units.CANONICAL)
+        row = [int(getattr(weather, 'time', time.time()))]
+        for attribute in FIELDS.values():
+            value = getattr(weather, attribute, None)
+            if value is not None and attribute in table:
+                scale, offset = table[attribute]
+                value = value * scale + offset
+            row.append(value)
+        with self.lock, self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO samples VALUES ({})'.format(
+                    ', '.join('?' * len(row))), row)
+        if time.time() >= self.next_compact:
+            self.compact()
+
+    def compact(self):
+        """ Downsample old rows to hourly averages and apply retention. """
+        now = time.time()
+        # Only fold whole hours, so each hourly row is written exactly once
+        raw_cutoff = int(now - self.raw_days * 86400) // 3600 * 3600
+        cutoff = int(now - self.days * 86400)
+        averages = ', '.join('AVG({})'.format(name) for name in FIELDS)
+        with self.lock, self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO hourly SELECT time / 3600 * 3600, {} '
+                'FROM samples WHERE time < ? GROUP BY time / 3600'.format(
+                    averages), (raw_cutoff,))
+            self.db.execute('DELETE FROM samples WHERE time < ?',
+                            (raw_cutoff,))
+            self.db.execute('DELETE FROM hourly WHERE time < ?', (cutoff,))
+        self.next_compact = now + 3600
+
+    def series(self, field, seconds, buckets, now=None,
+               target=units.CANONICAL):
+        """
+        Summarise the last `seconds` of `field` into `buckets` equal time
+        buckets. Returns a list with (min, max, mean) for each bucket, in
+        the `target` unit system, or None where there were no samples. The
+        bucketing is done by SQLite in one grouped query rather than row by
+        row in Python.
+        """
+        if field not in FIELDS:
+            raise ValueError('Unknown history field {!r}'.format(field))
+        if now is None:
+            now = time.time()
+        since = int(now - seconds)
+        query = (
+            'SELECT CAST((time - :since) * :buckets / :seconds AS INTEGER) '
+            'AS bucket, MIN({0}), MAX({0}), AVG({0}) FROM ('
+            'SELECT time, {0} FROM samples WHERE time >= :since '
+            'UNION ALL SELECT time, {0} FROM hourly WHERE time >= :since) '
+            'WHERE {0} IS NOT NULL GROUP BY bucket'.format(field))
+        result = [None] * buckets
+        with self.lock:
+            rows = self.db.execute(query, {'since': since,
+                                           'buckets': buckets,
+                                           'seconds': seconds}).fetchall()
+        scale, offset = units.field_table(units.CANONICAL, target).get(
+            FIELDS[field], (1, 0))
+        for bucket, low, high, mean in rows:
+            if 0 <= bucket < buckets:
+                result[bucket] = (low * scale + offset,
+                                  high * scale + offset,
+                                  mean * scale + offset)
+        return result
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+""" Keeps decoded weather icons, trading memory against decode time. """
+import collections
+import io
+
+import pygame
+
+MODES = ('full', 'palette', 'lru')
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+def quantize(surface):
+    """
+    Copy an opaque surface to an 8 bit palettized one, with a palette of
+    its most common colours. Icons are a handful of hues with antialiased
+    edges, so 256 colours cover them well at a quarter of the memory.
+    """
+    rgb = pygame.image.tostring(surface, 'RGB')
+    counts = collections.Counter(zip(rgb[0::3], rgb[1::3], rgb[2::3]))
+    palette = [color for color, count in counts.most_common(256)]
+    palette.extend([(0, 0, 0)] * (256 - len(palette)))
+    small = pygame.Surface(surface.get_size(), 0, 8)
+    small.set_palette(palette)
+    small.blit(surface, (0, 0))
+    return small
+
+
+class IconCache:
+    """
+    Icon storage in one of MODES:
+      full    - every decoded icon kept in the display format (fastest)
+      palette - every icon kept as an 8 bit palettized surface
+      lru     - the PNG files kept compressed in memory and only the
+                `capacity` most recently used icons kept decoded
+    `load(path)` turns a file (or file object) into a ready-to-blit,
+    opaque surface. The bytes held are totalled as icons come and go, so
+    footprint() is safe to read from another thread.
+    """
+
+    def __init__(self, load, mode='full', capacity=8):
+        if mode not in MODES:
+            raise ValueError('ICON_MODE must be one of {}'.format(
+                ', '.join(MODES)))
+        self.load = load
+        self.mode = mode
+        self.capacity = max(1, capacity)
+        self.decoded = collections.OrderedDict()
+        self.compressed = {}
+        self.decoded_bytes = 0
+        self.compressed_bytes = 0
+
+    def get(self, path):
+        """ Returns (surface, True if it was already decoded). """
+        icon = self.decoded.get(path)
+        if icon is not None:
+            if self.mode == 'lru':
+                self.decoded.move_to_end(path)
+            return icon, True
+        if self.mode == 'lru':
+            data = self.compressed.get(path)
+            if data is None:
+                with open(path, 'rb') as icon_file:
+                    data = self.compressed[path] = icon_file.read()
+                self.compressed_bytes += len(data)
+            icon = self.load(io.BytesIO(data))
+            self.decoded[path] = icon
+            self.decoded_bytes += surface_bytes(icon)
+            while len(self.decoded) > self.capacity:
+                evicted = self.decoded.popitem(last=False)[1]
+                self.decoded_bytes -= surface_bytes(evicted)
+        else:
+            icon = self.load(path)
+            if self.mode == 'palette':
+                icon = quantize(icon)
+            self.decoded[path] = icon
+            self.decoded_bytes += surface_bytes(icon)
+        return icon, False
+
+    def footprint(self):
+        """ Bytes held: (decoded surfaces, compressed files). """
+        return self.decoded_bytes, self.compressed_bytes
+
+    def clear(self):
+        self.decoded.clear()
+        self.compressed.clear()
+        self.decoded_bytes = 0
+        self.compressed_bytes = 0
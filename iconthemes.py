@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Maps Dark Sky icon names to the image files of an icon theme.
+
+https://darksky.net/dev/docs lists the icon values as clear-day,
+clear-night, rain, snow, sleet, wind, fog, cloudy, partly-cloudy-day and
+partly-cloudy-night, and warns that hail, thunderstorm or tornado may be
+added, so every theme covers those too and anything else falls back to
+the theme's 'unknown' icon.
+"""
+import logging
+import os
+
+LOG = logging.getLogger(__name__)
+
+# Theme -> {dark sky icon: (day file, night file, chance day, chance night)}
+# Paths are relative to the icon root with {size} filled in; a chance file
+# of None means the theme has no "chance of" variant for that icon.
+THEMES = {
+    'icons': {
+        'clear-day': ('{size}/clear.png', '{size}/nt_clear.png',
+                      None, None),
+        'clear-night': ('{size}/nt_clear.png', '{size}/nt_clear.png',
+                        None, None),
+        'rain': ('{size}/rain.png', '{size}/nt_rain.png',
+                 '{size}/chancerain.png', '{size}/nt_chancerain.png'),
+        'snow': ('{size}/snow.png', '{size}/nt_snow.png',
+                 '{size}/chancesnow.png', '{size}/nt_chancesnow.png'),
+        'sleet': ('{size}/sleet.png', '{size}/nt_sleet.png',
+                  '{size}/chancesleet.png', '{size}/nt_chancesleet.png'),
+        'wind': ('alt_icons/{size}/wind.png', 'alt_icons/{size}/wind.png',
+                 None, None),
+        'fog': ('{size}/fog.png', '{size}/nt_fog.png', None, None),
+        'cloudy': ('{size}/cloudy.png', '{size}/nt_cloudy.png',
+                   None, None),
+        'partly-cloudy-day': ('{size}/partlycloudy.png',
+                              '{size}/nt_partlycloudy.png', None, None),
+        'partly-cloudy-night': ('{size}/nt_partlycloudy.png',
+                                '{size}/nt_partlycloudy.png', None, None),
+        'hail': ('alt_icons/{size}/hail.png', 'alt_icons/{size}/hail.png',
+                 None, None),
+        'thunderstorm': ('{size}/tstorms.png', '{size}/nt_tstorms.png',
+                         '{size}/chancetstorms.png',
+                         '{size}/nt_chancetstorms.png'),
+        'tornado': ('alt_icons/{size}/tornado.png',
+                    'alt_icons/{size}/tornado.png', None, None),
+        'unknown': ('{size}/unknown.png', '{size}/nt_unknown.png',
+                    None, None),
+    },
+    'alt_icons': {
+        'clear-day': ('alt_icons/{size}/clear-day.png',
+                      'alt_icons/{size}/clear-night.png', None, None),
+        'clear-night': ('alt_icons/{size}/clear-night.png',
+                        'alt_icons/{size}/clear-night.png', None, None),
+        'partly-cloudy-day': ('alt_icons/{size}/partly-cloudy-day.png',
+                              'alt_icons/{size}/partly-cloudy-night.png',
+                              None, None),
+        'partly-cloudy-night': ('alt_icons/{size}/partly-cloudy-night.png',
+                                'alt_icons/{size}/partly-cloudy-night.png',
+                                None, None),
+        'unknown': ('{size}/unknown.png', '{size}/nt_unknown.png',
+                    None, None),
+    },
+}
+# The rest of the alt_icons set is one picture for day and night
+for _name in ('rain', 'snow', 'sleet', 'wind', 'fog', 'cloudy', 'hail',
+              'thunderstorm', 'tornado'):
+    _path = 'alt_icons/{size}/' + _name + '.png'
+    THEMES['alt_icons'][_name] = (_path, _path, None, None)
+
+
+class IconTheme:
+    """
+    The files of one theme at one size, looked up by (icon, night, chance)
+    in a dict built once. Every file is checked when the theme is loaded,
+    so a missing asset is reported at startup and replaced by the unknown
+    icon rather than failing in the middle of drawing a frame.
+    """
+
+    def __init__(self, theme='icons', size='64', root='icons'):
+        if theme not in THEMES:
+            raise ValueError('ICON_THEME must be one of {}'.format(
+                ', '.join(sorted(THEMES))))
+        self.theme = theme
+        self.paths = {}
+        missing = []
+        for icon, variants in THEMES[theme].items():
+            day, night, chance_day, chance_night = [
+                None if path is None else
+                os.path.join(root, path.format(size=size))
+                for path in variants]
+            for key, path in (((icon, False, False), day),
+                              ((icon, True, False), night),
+                              ((icon, False, True), chance_day or day),
+                              ((icon, True, True), chance_night or night)):
+                if os.path.isfile(path):
+                    self.paths[key] = path
+                elif path not in missing:
+                    missing.append(path)
+        for path in missing:
+            LOG.warning('Icon %s is missing.', path)
+        self.unknown = (self.paths.get(('unknown', False, False)),
+                        self.paths.get(('unknown', True, False)))
+        if None in self.unknown:
+            raise Exception('The {0} icon theme has no unknown icon at size '
+                            '{1}!'.format(theme, size))
+
+    def path(self, icon, night=False, chance=False):
+        try:
+            return self.paths[icon, night, chance]
+        except KeyError:
+            return self.unknown[night]
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+""" One line of text in a fixed box, scrolled when it doesn't fit. """
+import time
+
+import pygame
+
+
+class Marquee:
+    """
+    Text that fits `rect` is rendered once and drawn centred. Longer text
+    is rendered once to a strip holding it twice, `gap` box widths apart;
+    each frame copies a box-sized window of the strip at an offset that
+    advances `speed` pixels a second, so scrolling never re-renders text.
+    """
+
+    def __init__(self, rect, speed=60, gap=0.3):
+        self.rect = pygame.Rect(rect)
+        self.speed = speed
+        self.gap = int(self.rect.width * gap)
+        self.text = None
+        self.strip = None
+        self.period = 0
+
+    @property
+    def scrolling(self):
+        return self.period > 0
+
+    def set_text(self, font, text, color, background=(0, 0, 0)):
+        """ Render new text, if it changed. Empty text draws nothing. """
+        if (text, color) == self.text:
+            return
+        self.text = (text, color)
+        self.period = 0
+        if not text:
+            self.strip = None
+            return
+        rendered = font.render(text, True, color, background)
+        width, height = rendered.get_size()
+        if width <= self.rect.width:
+            self.strip = rendered.convert()
+            return
+        self.period = width + self.gap
+        self.strip = pygame.Surface((self.period + width, height)).convert()
+        self.strip.fill(background)
+        self.strip.blit(rendered, (0, 0))
+        self.strip.blit(rendered, (self.period, 0))
+
+    def draw(self, surface, now=None):
+        if self.strip is None:
+            return
+        if not self.scrolling:
+            surface.blit(self.strip, (
+                self.rect.centerx - self.strip.get_width() // 2,
+                self.rect.top))
+            return
+        if now is None:
+            now = time.time()
+        offset = int(now * self.speed) % self.period
+        surface.blit(self.strip, self.rect.topleft,
+                     (offset, 0, self.rect.width, self.strip.get_height()))
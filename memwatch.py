@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+""" Watches the process for memory growth over weeks of running. """
+import gc
+import logging
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+
+import pygame
+
+LOG = logging.getLogger(__name__)
+
+ACTIONS = ('warn', 'restart')
+
+
+def rss_bytes():
+    """ Resident set size now, or the peak where /proc isn't available. """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def live_surfaces():
+    """
+    (count, bytes) of the pygame surfaces still referenced. Surfaces aren't
+    tracked by the garbage collector, so they are found through the
+    containers, instances and stack frames that hold them. A dict or tuple
+    holding only untracked objects (like a dict of frames) is untracked
+    too, so those are looked into as well.
+    """
+    surfaces = {}
+    untracked = []
+    for holder in gc.get_objects():
+        untracked.extend(gc.get_referents(holder))
+    seen = set()
+    while untracked:
+        obj = untracked.pop()
+        if isinstance(obj, pygame.Surface):
+            surfaces[id(obj)] = obj
+        elif isinstance(obj, (dict, list, tuple)) and \
+                not gc.is_tracked(obj) and id(obj) not in seen:
+            seen.add(id(obj))
+            untracked.extend(gc.get_referents(obj))
+    return (len(surfaces),
+            sum(surface.get_pitch() * surface.get_height()
+                for surface in surfaces.values()))
+
+
+class MemoryWatchdog:
+    """
+    Samples memory every `interval` seconds on a background thread. The
+    resident set size is always checked against `rss_limit` (bytes, 0 for
+    none). With `detail` each sample also counts live surfaces, under
+    the mode on screen at the time, takes gc statistics and compares a
+    tracemalloc snapshot with the previous one to log the `top` call sites
+    that grew the most. Tracing slows every allocation, so it is opt-in.
+    The main loop take()s each sample and decides what to do about it.
+    """
+
+    def __init__(self, interval=300, rss_limit=0, action='warn',
+                 detail=False, top=10, mode=None):
+        if action not in ACTIONS:
+            raise ValueError('MEMORY_LIMIT_ACTION must be one of {}'.format(
+                ', '.join(ACTIONS)))
+        self.interval = interval
+        self.rss_limit = rss_limit
+        self.action = action
+        self.detail = detail
+        self.top = top
+        self.mode = mode or (lambda: None)
+        self.surfaces = {}
+        self.rss = None
+        self.snapshot = None
+        self.sample = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        if detail and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.thread = threading.Thread(target=self._watch, name='memory',
+                                       daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """ Take and log a sample, leaving it for take(). """
+        rss = rss_bytes()
+        sample = {
+            'rss': rss,
+            'growth': rss - self.rss if self.rss is not None else 0,
+            'over_limit': bool(self.rss_limit) and rss > self.rss_limit,
+            'mode': self.mode(),
+        }
+        self.rss = rss
+        if self.detail:
+            sample.update(self._details(sample))
+        if sample['over_limit']:
+            LOG.warning('Memory: %.1f MB resident, over the %.1f MB limit',
+                        rss / 1e6, self.rss_limit / 1e6)
+        with self.lock:
+            self.sample = sample
+        return sample
+
+    def _details(self, sample):
+        count, surface_bytes = live_surfaces()
+        if sample['mode'] is not None:
+            self.surfaces[sample['mode']] = count
+        gc_objects = len(gc.get_objects())
+        generations = gc.get_stats()
+        LOG.info(
+            'Memory: %.1f MB resident (%+.1f MB); %d surfaces, %.1f MB; '
+            '%d gc objects, collections %s, %d uncollectable; surfaces by '
+            'mode %s', sample['rss'] / 1e6, sample['growth'] / 1e6, count,
+            surface_bytes / 1e6, gc_objects,
+            '/'.join(str(generation['collections'])
+                     for generation in generations),
+            len(gc.garbage),
+            ', '.join('{0} {1}'.format(name, number)
+                      for name, number in sorted(self.surfaces.items())))
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        if self.snapshot is None:
+            stats = snapshot.statistics('lineno')[:self.top]
+            LOG.info('Largest allocation sites:\n%s', '\n'.join(
+                str(stat) for stat in stats))
+        else:
+            stats = [stat for stat in
+                     snapshot.compare_to(self.snapshot, 'lineno')
+                     if stat.size_diff > 0][:self.top]
+            LOG.info('Allocation sites that grew most:\n%s', '\n'.join(
+                str(stat) for stat in stats))
+        self.snapshot = snapshot
+        return {
+            'surfaces': count,
+            'surface_bytes': surface_bytes,
+            'gc_objects': gc_objects,
+        }
+
+    def take(self):
+        """ The sample taken since the last call, or None. """
+        with self.lock:
+            sample, self.sample = self.sample, None
+        return sample
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+""" Minute by minute rain forecast for the next hour. """
+import time
+from array import array
+
+
+class Nowcast:
+    """
+    Compact copy of Dark Sky's `minutely` block: the intensities and
+    probabilities as two float arrays instead of 61 DataPoint objects, plus
+    when the rain starts and stops, found in a single pass.
+
+    A minute counts as wet when its intensity is at least `threshold` (in
+    the units of the response) and its probability at least
+    `min_probability`. `rain_start` and `rain_stop` are minutes from the
+    start of the block, or None if it doesn't happen within the hour.
+    """
+
+    def __init__(self, minutely, threshold, min_probability=0.5):
+        parse_start = time.perf_counter()
+        points = minutely.data
+        self.start = points[0].time if points else time.time()
+        self.summary = getattr(minutely, 'summary', '')
+        self.threshold = threshold
+        self.intensity = array('f', [
+            getattr(point, 'precipIntensity', 0) or 0 for point in points])
+        self.probability = array('f', [
+            getattr(point, 'precipProbability', 0) or 0 for point in points])
+        self.rain_start = None
+        self.rain_stop = None
+        for minute, (intensity, probability) in enumerate(
+                zip(self.intensity, self.probability)):
+            wet = intensity >= threshold and probability >= min_probability
+            if self.rain_start is None:
+                if wet:
+                    self.rain_start = minute
+            elif not wet:
+                self.rain_stop = minute
+                break
+        self.max_intensity = max(self.intensity) if points else 0
+        self.parse_seconds = time.perf_counter() - parse_start
+
+    def __len__(self):
+        return len(self.intensity)
+
+    @property
+    def raining(self):
+        return self.rain_start == 0
+
+    def minutes_until(self, minute, now=None):
+        """ Minutes from now until `minute` of the block. """
+        if now is None:
+            now = time.time()
+        return max(0, int(round(minute - (now - self.start) / 60.0)))
+
+    def describe(self, now=None):
+        """ One line for the screen, e.g. 'Rain stopping in 12 min'. """
+        if self.rain_start is None:
+            return 'No rain for the next hour'
+        starts_in = self.minutes_until(self.rain_start, now)
+        if starts_in > 0:
+            text = 'Rain starting in {0} min'.format(starts_in)
+            if self.rain_stop is not None:
+                text += ', lasting {0} min'.format(self.rain_stop -
+                                                   self.rain_start)
+            return text
+        if self.rain_stop is None:
+            return 'Rain for the rest of the hour'
+        stops_in = self.minutes_until(self.rain_stop, now)
+        if stops_in > 0:
+            return 'Rain stopping in {0} min'.format(stops_in)
+        return 'Rain has stopped'
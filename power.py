@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+""" Turns the screen off (or down) at night and during quiet hours. """
+import datetime
+import glob
+import logging
+import subprocess
+import time
+
+import pygame
+
+LOG = logging.getLogger(__name__)
+
+METHODS = ('blank', 'dim', 'backlight', 'hdmi', 'dpms')
+
+
+def parse_clock(value):
+    """ 'HH:MM' -> datetime.time """
+    return datetime.datetime.strptime(value, '%H:%M').time()
+
+
+class PowerManager:
+    """
+    Decides when the display should sleep and puts it to sleep with one of
+    METHODS:
+      blank     - stop drawing and leave the framebuffer black
+      dim       - keep drawing, darkened by dim_level (0 = black, 1 = normal)
+      backlight - stop drawing and switch off a DSI/SPI panel backlight
+      hdmi      - stop drawing and power down HDMI with vcgencmd
+      dpms      - stop drawing and ask X to turn the monitor off
+    Sleep periods are the quiet hours (which may span midnight) and, with
+    `night` set, the time between sunset and sunrise. Any input wakes the
+    display for `wake_minutes`.
+    """
+
+    def __init__(self, method='blank', quiet_hours=None, night=False,
+                 wake_minutes=5, dim_level=0.3):
+        if method not in METHODS:
+            raise ValueError('POWER_METHOD must be one of {}'.format(
+                ', '.join(METHODS)))
+        self.method = method
+        self.quiet_hours = None
+        if quiet_hours:
+            self.quiet_hours = (parse_clock(quiet_hours[0]),
+                                parse_clock(quiet_hours[1]))
+        self.night = night
+        self.wake_minutes = wake_minutes
+        self.dim_level = dim_level
+        self.asleep = False
+        self.wake_until = 0
+        self.dim_overlay = None
+
+    @property
+    def enabled(self):
+        return bool(self.quiet_hours or self.night)
+
+    @property
+    def blanked(self):
+        """ True while the display is asleep and nothing should be drawn. """
+        return self.asleep and self.method != 'dim'
+
+    def in_quiet_hours(self, now):
+        if not self.quiet_hours:
+            return False
+        start, end = self.quiet_hours
+        now = now.time()
+        if start <= end:
+            return start <= now < end
+        return now >= start or now < end
+
+    def should_sleep(self, in_daylight, now=None):
+        if now is None:
+            now = datetime.datetime.now()
+        if time.time() < self.wake_until:
+            return False
+        return self.in_quiet_hours(now) or (self.night and not in_daylight)
+
+    def update(self, screen, in_daylight):
+        """
+        Sleep or wake the display to match the schedule. Returns True if
+        the state changed.
+        """
+        if not self.enabled:
+            return False
+        sleep = self.should_sleep(in_daylight)
+        if sleep == self.asleep:
+            return False
+        if sleep:
+            self.sleep(screen)
+        else:
+            self.wake_display()
+        return True
+
+    def wake(self):
+        """ Input arrived: keep the display on for a while. """
+        self.wake_until = time.time() + self.wake_minutes * 60
+        if self.asleep:
+            self.wake_display()
+            return True
+        return False
+
+    def sleep(self, screen):
+        LOG.info('Display going to sleep (%s).', self.method)
+        self.asleep = True
+        if self.method != 'dim':
+            screen.fill((0, 0, 0))
+            pygame.display.update()
+        self._switch(False)
+
+    def wake_display(self):
+        LOG.info('Display waking up.')
+        self.asleep = False
+        self._switch(True)
+
+    def dim(self, surface):
+        """ Darken a finished frame when asleep with the 'dim' method. """
+        if not self.asleep or self.method != 'dim':
+            return
+        if self.dim_overlay is None or \
+                self.dim_overlay.get_size() != surface.get_size():
+            self.dim_overlay = pygame.Surface(surface.get_size()).convert()
+            self.dim_overlay.fill((0, 0, 0))
+            self.dim_overlay.set_alpha(int(255 * (1 - self.dim_level)))
+        surface.blit(self.dim_overlay, (0, 0))
+
+    def _switch(self, on):
+        try:
+            if self.method == 'backlight':
+                for bl_power in glob.glob('/sys/class/backlight/*/bl_power'):
+                    with open(bl_power, 'w') as control:
+                        control.write('0' if on else '1')
+            elif self.method == 'hdmi':
+                subprocess.call(['vcgencmd', 'display_power',
+                                 '1' if on else '0'])
+            elif self.method == 'dpms':
+                subprocess.call(['xset', 'dpms', 'force',
+                                 'on' if on else 'off'])
+        except OSError as e:
+            LOG.error('Unable to switch the display %s: %s',
+                      'on' if on else 'off', e)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Optional timing of the render loop. Nothing here runs unless profiling is
+switched on, as the timers are installed by wrapping methods on the
+display instance rather than living in the draw code.
+"""
+import cProfile
+import functools
+import pstats
+import threading
+import time
+
+
+class _Stats:
+    def __init__(self):
+        self.samples = []
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        count = len(samples)
+        total = sum(samples)
+        return {
+            'count': count,
+            'total': total,
+            'mean': total / count,
+            'min': samples[0],
+            'p95': samples[min(count - 1, int(count * 0.95))],
+            'max': samples[-1],
+        }
+
+
+class Profiler:
+    """
+    Times wrapped methods with time.monotonic(), printing per-method
+    statistics every `interval` seconds. If `cprofile_frames` is set the
+    first that many frames (calls to a `frame_methods` method) are also
+    run under cProfile and the result is written to `cprofile_path`.
+    Wrapped methods may be called from several threads: the nesting depth
+    is kept per thread, and cProfile follows one frame at a time.
+    """
+
+    def __init__(self, interval=60, cprofile_frames=0,
+                 cprofile_path='weather.prof'):
+        self.interval = interval
+        self.stats = {}
+        self.window_start = time.monotonic()
+        self.cprofile_frames = cprofile_frames
+        self.cprofile_path = cprofile_path
+        self.cprofile = cProfile.Profile() if cprofile_frames else None
+        self.frames_profiled = 0
+        self.profiling = False
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def wrap(self, obj, names, frame_methods=()):
+        """ Replace obj.<name> for each name with a timed version. """
+        for name in names:
+            setattr(obj, name, self._timed(name, getattr(obj, name),
+                                           name in frame_methods))
+
+    def _timed(self, name, method, is_frame):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            depth = getattr(self.local, 'depth', 0)
+            profile = False
+            if is_frame and depth == 0:
+                with self.lock:
+                    profile = (self.cprofile is not None and
+                               not self.profiling)
+                    if profile:
+                        self.profiling = True
+            self.local.depth = depth + 1
+            if profile:
+                self.cprofile.enable()
+            start = time.monotonic()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.monotonic() - start
+                if profile:
+                    self.cprofile.disable()
+                    self._frame_profiled()
+                self.local.depth = depth
+                self.record(name, elapsed)
+        return timed
+
+    def record(self, name, seconds):
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = _Stats()
+            stats.add(seconds)
+            due = time.monotonic() - self.window_start >= self.interval
+        if due:
+            self.dump()
+
+    def _frame_profiled(self):
+        with self.lock:
+            self.profiling = False
+            self.frames_profiled += 1
+            if self.frames_profiled < self.cprofile_frames:
+                return
+            profile, self.cprofile = self.cprofile, None
+        profile.dump_stats(self.cprofile_path)
+        print('Profiled {0} frames, cProfile data saved to {1}'.format(
+            self.frames_profiled, self.cprofile_path))
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(15)
+
+    def dump(self):
+        with self.lock:
+            stats, self.stats = self.stats, {}
+            window_start, self.window_start = (self.window_start,
+                                               time.monotonic())
+        if not stats:
+            # Another thread printed this window already
+            return
+        window = time.monotonic() - window_start
+        print('Profile for the last {0:.0f} seconds:'.format(window))
+        print('{0:<26}{1:>7}{2:>11}{3:>10}{4:>10}{5:>10}{6:>10}'.format(
+            'method', 'calls', 'total ms', 'mean ms', 'min ms', 'p95 ms',
+            'max ms'))
+        summaries = sorted(((name, method.summary())
+                            for name, method in stats.items()),
+                           key=lambda item: item[1]['total'], reverse=True)
+        for name, summary in summaries:
+            print('{0:<26}{1:>7}{2:>11.2f}{3:>10.3f}{4:>10.3f}{5:>10.3f}'
+                  '{6:>10.3f}'.format(
+                      name, summary['count'], summary['total'] * 1000,
+                      summary['mean'] * 1000, summary['min'] * 1000,
+                      summary['p95'] * 1000, summary['max'] * 1000))
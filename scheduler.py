@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+""" Decides when to ask Dark Sky for a new forecast. """
+import datetime
+import json
+import logging
+import os
+import time
+
+LOG = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Picks the time between forecast checks from the weather itself:
+    `min_interval` when rain is likely or the temperature is about to move
+    a lot in the next `lookahead` hours, `base_interval` normally, twice
+    that when nothing is happening and `max_interval` overnight.
+
+    Every API call is counted against `daily_budget`, and the count is
+    saved to `state_path` so restarts don't reset it. Checks are spread so
+    the remaining budget lasts until midnight; once it is spent no more
+    calls are made that day.
+    """
+
+    def __init__(self, base_interval=300, min_interval=120,
+                 max_interval=1800, daily_budget=900,
+                 state_path='api_calls.json', temperature_swing=5,
+                 lookahead=3, adaptive=True):
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.daily_budget = daily_budget
+        self.state_path = state_path
+        self.temperature_swing = temperature_swing
+        self.lookahead = lookahead
+        self.adaptive = adaptive
+        self.interval = base_interval
+        self.reason = 'default'
+        self.day = None
+        self.calls_today = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.state_path) as state_file:
+                state = json.load(state_file)
+            day = datetime.datetime.strptime(state['date'],
+                                             '%Y-%m-%d').date()
+            calls = int(state['calls'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        if day == datetime.date.today():
+            self.day = day
+            self.calls_today = calls
+
+    def save(self):
+        temp_path = self.state_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as state_file:
+                json.dump({'date': self.day.strftime('%Y-%m-%d'),
+                           'calls': self.calls_today}, state_file)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            LOG.warning('Unable to save API call count: %s', e)
+
+    def _roll_over(self):
+        today = datetime.date.today()
+        if today != self.day:
+            self.day = today
+            self.calls_today = 0
+
+    def record_call(self):
+        self._roll_over()
+        self.calls_today += 1
+        self.save()
+
+    def remaining(self):
+        self._roll_over()
+        return max(0, self.daily_budget - self.calls_today)
+
+    def plan(self, weather, in_daylight=True):
+        """ Choose the check interval after new forecast data arrives. """
+        if not self.adaptive:
+            self.interval, self.reason = self.base_interval, 'fixed'
+            return self.interval
+        hours = weather.hourly.data[:self.lookahead]
+        rain_chances = [getattr(hour, 'precipProbability', 0)
+                        for hour in hours]
+        temperatures = [hour.temperature for hour in hours
+                        if hasattr(hour, 'temperature')]
+        rain_chances.append(getattr(weather, 'precipProbability', 0))
+        swing = max(temperatures) - min(temperatures) if temperatures else 0
+        if max(rain_chances) >= 0.3 or swing >= self.temperature_swing:
+            self.interval, self.reason = self.min_interval, 'changing'
+        elif not in_daylight:
+            self.interval, self.reason = self.max_interval, 'overnight'
+        elif max(rain_chances) < 0.05 and \
+                swing < self.temperature_swing / 2:
+            self.interval = min(self.base_interval * 2, self.max_interval)
+            self.reason = 'stable'
+        else:
+            self.interval, self.reason = self.base_interval, 'normal'
+        return self.interval
+
+    def budget_interval(self, now=None):
+        """ Shortest interval that keeps today's calls within budget. """
+        if now is None:
+            now = datetime.datetime.now()
+        remaining = self.remaining()
+        midnight = datetime.datetime.combine(
+            now.date() + datetime.timedelta(days=1), datetime.time())
+        seconds_left = (midnight - now).total_seconds()
+        if remaining == 0:
+            return seconds_left
+        return seconds_left / remaining
+
+    def due(self, last_check, interval=None, now=None):
+        """ True if a check should be made now, given the last one. """
+        if now is None:
+            now = time.time()
+        if interval is None:
+            interval = self.interval
+        if self.remaining() == 0:
+            return False
+        return now - last_check > max(interval, self.budget_interval())
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+""" Saves screenshots of the display without blocking the render loop. """
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+
+import pygame
+
+LOG = logging.getLogger(__name__)
+
+FORMATS = {
+    'png': 'png',
+    'jpeg': 'jpeg',
+    'jpg': 'jpeg',
+    'raw': 'rgb',
+}
+
+
+class ScreenCapture:
+    """
+    The render loop only copies the display surface; encoding and writing
+    the file happen on a background thread. Files are named
+    screenshot-YYYYmmdd-HHMMSSmmm.<ext>. 'raw' writes the bare RGB24 pixel
+    data with the size in the name, e.g. screenshot-...-1024x768.rgb.
+    """
+
+    def __init__(self, directory='.', image_format='jpeg', interval=0,
+                 keep=0):
+        image_format = image_format.lower()
+        if image_format not in FORMATS:
+            raise ValueError('Unknown screenshot format {!r}, use one of '
+                             '{}'.format(image_format, ', '.join(FORMATS)))
+        self.directory = directory
+        self.image_format = image_format
+        self.extension = FORMATS[image_format]
+        self.interval = interval
+        self.keep = keep
+        self.next_periodic = time.time() + interval if interval else None
+        # A slow SD card must not let copies of the screen pile up in RAM
+        self.queue = queue.Queue(maxsize=2)
+        self.thread = None
+
+    def capture(self, surface):
+        """ Queue a copy of `surface` to be saved. Returns False if busy. """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._worker,
+                                           name='screencap', daemon=True)
+            self.thread.start()
+        try:
+            self.queue.put_nowait((time.time(), surface.copy()))
+        except queue.Full:
+            LOG.warning('Screen capture skipped, previous captures still saving.')
+            return False
+        return True
+
+    def periodic(self, surface):
+        """ Capture `surface` if the periodic capture interval has passed. """
+        if self.next_periodic is None or time.time() < self.next_periodic:
+            return
+        self.next_periodic = time.time() + self.interval
+        self.capture(surface)
+
+    def _filename(self, timestamp, size):
+        stamp = '{}{:03d}'.format(
+            time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp)),
+            int(timestamp * 1000) % 1000)
+        if self.image_format == 'raw':
+            stamp = '{}-{}x{}'.format(stamp, size[0], size[1])
+        return os.path.join(self.directory, 'screenshot-{}.{}'.format(
+            stamp, self.extension))
+
+    def _worker(self):
+        while True:
+            timestamp, surface = self.queue.get()
+            path = self._filename(timestamp, surface.get_size())
+            try:
+                if self.directory:
+                    os.makedirs(self.directory, exist_ok=True)
+                if self.image_format == 'raw':
+                    with open(path, 'wb') as raw_file:
+                        raw_file.write(pygame.image.tostring(surface, 'RGB'))
+                else:
+                    pygame.image.save(surface, path)
+            except (OSError, pygame.error) as e:
+                LOG.error('Screen capture to %s failed: %s', path, e)
+                continue
+            LOG.info('Screen capture saved to %s.', path)
+            self._prune()
+
+    def _prune(self):
+        if not self.keep:
+            return
+        pattern = os.path.join(self.directory,
+                               'screenshot-*.{}'.format(self.extension))
+        for old_file in sorted(glob.glob(pattern))[:-self.keep]:
+            try:
+                os.remove(old_file)
+            except OSError:
+                pass
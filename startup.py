@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+""" Startup helpers: remembering the video driver and timing each phase. """
+import contextlib
+import logging
+import os
+import time
+
+LOG = logging.getLogger(__name__)
+
+
+def load_driver(path):
+    """ The SDL video driver that worked last time, or None. """
+    if not path:
+        return None
+    try:
+        with open(path) as driver_file:
+            return driver_file.read().strip() or None
+    except OSError:
+        return None
+
+
+def save_driver(path, driver):
+    if not path:
+        return
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'w') as driver_file:
+            driver_file.write(driver + '\n')
+        os.replace(temp_path, path)
+    except OSError as e:
+        LOG.warning('Unable to save the video driver: %s', e)
+
+
+class StartupTimer:
+    """
+    Times the phases of startup so time-to-first-frame can be tracked.
+    Phases are reported in the order they were recorded, followed by the
+    time from creating the timer to `report`.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases = []
+        self.reported = False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        phase_start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - phase_start)
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def report(self):
+        """
+        Log the phase times, once, printing them instead when logging isn't
+        set up to let them through. Returns the total.
+        """
+        total = time.monotonic() - self.started
+        self.reported = True
+        message = 'Startup: {0}; first frame after {1:.2f}s'.format(
+            ', '.join('{0} {1:.3f}s'.format(name, seconds)
+                      for name, seconds in self.phases), total)
+        if LOG.isEnabledFor(logging.INFO) and LOG.hasHandlers():
+            LOG.info('%s', message)
+        else:
+            print(message)
+        return total
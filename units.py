@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Converts forecasts between Dark Sky unit systems locally, so the API is
+always asked for one system and a change of UNITS needs no new request.
+"""
+
+# The unit system every forecast is requested in
+CANONICAL = 'si'
+
+# Dark Sky field -> the quantity it measures
+QUANTITIES = {
+    'temperature': 'temperature',
+    'apparentTemperature': 'temperature',
+    'dewPoint': 'temperature',
+    'temperatureHigh': 'temperature',
+    'temperatureLow': 'temperature',
+    'temperatureMin': 'temperature',
+    'temperatureMax': 'temperature',
+    'apparentTemperatureHigh': 'temperature',
+    'apparentTemperatureLow': 'temperature',
+    'apparentTemperatureMin': 'temperature',
+    'apparentTemperatureMax': 'temperature',
+    'windSpeed': 'speed',
+    'windGust': 'speed',
+    'nearestStormDistance': 'distance',
+    'visibility': 'distance',
+    'precipIntensity': 'intensity',
+    'precipIntensityMax': 'intensity',
+    'precipIntensityError': 'intensity',
+    'precipAccumulation': 'accumulation',
+}
+
+# Unit system -> quantity -> (scale, offset) from the SI value. Pressure
+# is hectopascals (= millibars) everywhere, so it never changes.
+SCALES = {
+    'si': {},
+    'ca': {
+        'speed': (3.6, 0),
+    },
+    'uk2': {
+        'speed': (2.2369363, 0),
+        'distance': (0.62137119, 0),
+    },
+    'us': {
+        'temperature': (1.8, 32),
+        'speed': (2.2369363, 0),
+        'distance': (0.62137119, 0),
+        'intensity': (1 / 25.4, 0),
+        'accumulation': (1 / 2.54, 0),
+    },
+}
+
+
+def field_table(source, target):
+    """ {field: (scale, offset)} for the fields that change. """
+    for units in (source, target):
+        if units not in SCALES:
+            raise ValueError('Unknown unit system {!r}, expected one of '
+                             '{}'.format(units, ', '.join(sorted(SCALES))))
+    table = {}
+    for field, quantity in QUANTITIES.items():
+        source_scale, source_offset = SCALES[source].get(quantity, (1, 0))
+        target_scale, target_offset = SCALES[target].get(quantity, (1, 0))
+        scale = target_scale / source_scale
+        offset = target_offset - source_offset * scale
+        if (scale, offset) != (1, 0):
+            table[field] = (scale, offset)
+    return table
+
+
+def current_units(weather):
+    flags = getattr(weather, 'flags', None)
+    return getattr(flags, 'units', None) or CANONICAL
+
+
+def convert(weather, target):
+    """
+    Convert a forecast in place to the `target` unit system, from the one
+    recorded in its flags, and return it. The table is worked out once
+    and applied to every data point in one pass.
+    """
+    table = list(field_table(current_units(weather), target).items())
+    if table:
+        points = [weather.currently]
+        for block in ('minutely', 'hourly', 'daily'):
+            # Not getattr(weather, ...): Forecast falls back to currently
+            if block in weather._data:
+                points.extend(getattr(weather, block).data)
+        for point in points:
+            data = point._data
+            for field, (scale, offset) in table:
+                value = data.get(field)
+                if isinstance(value, (int, float)):
+                    value = value * scale + offset
+                    data[field] = value
+                    object.__setattr__(point, field, value)
+    flags = getattr(weather, 'flags', None)
+    if flags is not None:
+        flags.units = target
+        flags._data['units'] = target
+    return weather
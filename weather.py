@@ -36,27 +36,113 @@ __version__ = "0.0.12"
 #   Modified By: Gene Liverman    12/30/2017 & multiple times since
 ###############################################################################
 # standard imports
+import argparse
 import datetime
+import logging
+import math
 import os
 import platform
 import signal
 import sys
-import syslog
+import threading
 import time
 
 # third party imports
 from darksky import forecast
 import pygame
 # from pygame.locals import *
-import requests
 
 # local imports
 import config
 
+import alerts
+import buttons
+import configwatch
+import fetcher
+import fonts
+import governor
+import history
+import iconcache
+import iconthemes
+import marquee
+import memwatch
+import metrics
+import nowcast
+import power
+import profiler
+import scheduler
+import screencap
+import startup
+import units
+import weatherlog
+
 # globals
+LOG = logging.getLogger('weather')
 MODE = 'd'  # Default to weather mode.
 MOUSE_X, MOUSE_Y = 0, 0
 UNICODE_DEGREE = u'\xb0'
+SEVERITY_COLORS = {
+    'warning': (255, 64, 64),
+    'watch': (255, 160, 64),
+    'advisory': (255, 255, 96),
+}
+
+# Instrumentation, served over HTTP when config.METRICS_PORT is set.
+FRAME_SECONDS = metrics.REGISTRY.histogram(
+    'piweatherrock_frame_render_seconds',
+    'Time taken to render one frame.', ('mode',))
+FONT_CACHE = metrics.REGISTRY.counter(
+    'piweatherrock_font_cache_total',
+    'Font lookups, by whether the font was already loaded.', ('result',))
+ICON_CACHE = metrics.REGISTRY.counter(
+    'piweatherrock_icon_cache_total',
+    'Icon lookups, by whether the icon was already loaded.', ('result',))
+ICON_BYTES = metrics.REGISTRY.gauge(
+    'piweatherrock_icon_bytes',
+    'Memory held by icons, decoded or compressed.', ('form',))
+FETCH_SECONDS = metrics.REGISTRY.histogram(
+    'piweatherrock_fetch_seconds',
+    'Time taken by Dark Sky forecast requests.')
+FETCH_ERRORS = metrics.REGISTRY.counter(
+    'piweatherrock_fetch_errors_total',
+    'Failed forecast fetches, by exception type.', ('type',))
+FETCH_CIRCUIT_OPEN = metrics.REGISTRY.gauge(
+    'piweatherrock_fetch_circuit_open',
+    '1 while forecast requests are paused after repeated failures.')
+API_CALLS = metrics.REGISTRY.counter(
+    'piweatherrock_api_calls_total',
+    'Requests made to the Dark Sky API.')
+API_CALLS_TODAY = metrics.REGISTRY.gauge(
+    'piweatherrock_api_calls_today',
+    'Requests made to the Dark Sky API since local midnight.')
+LOOP_WAKEUPS = metrics.REGISTRY.counter(
+    'piweatherrock_loop_wakeups_total',
+    'Main loop iterations, by what woke the loop.', ('reason',))
+CURRENT_MODE = metrics.REGISTRY.gauge(
+    'piweatherrock_mode',
+    'Current display mode (1 for the active mode).', ('mode',))
+NOWCAST_PARSE_SECONDS = metrics.REGISTRY.histogram(
+    'piweatherrock_nowcast_parse_seconds',
+    'Time taken to convert the minutely block into a Nowcast.')
+STARTUP_SECONDS = metrics.REGISTRY.gauge(
+    'piweatherrock_startup_seconds',
+    'Time taken by each phase of startup.', ('phase',))
+RSS_BYTES = metrics.REGISTRY.gauge(
+    'piweatherrock_rss_bytes',
+    'Resident memory of the process, sampled by the memory watchdog.')
+LIVE_SURFACES = metrics.REGISTRY.gauge(
+    'piweatherrock_live_surfaces',
+    'pygame surfaces alive when memory was last sampled in each mode.',
+    ('mode',))
+FRAME_BUILD_ERRORS = metrics.REGISTRY.counter(
+    'piweatherrock_frame_build_errors_total',
+    'Background frame rebuilds that failed, leaving the old frames up.')
+CONFIG_RELOADS = metrics.REGISTRY.counter(
+    'piweatherrock_config_reloads_total',
+    'Edits to config.py applied while running.')
+
+# Started as soon as the modules are loaded; reported with the first frame.
+STARTUP = startup.StartupTimer()
 
 
 def exit_gracefully(signum, frame):
@@ -75,7 +161,7 @@ def deg_to_compass(degrees):
     return dirs[(val % 16)]
 
 
-def units_decoder(units):
+def units_decoder(unit):
     """
     https://darksky.net/dev/docs has lists out what each
     unit is. The method below is just a codified version
@@ -125,7 +211,7 @@ def units_decoder(units):
         'us': us_dict,
         'si': si_dict,
     }
-    return switcher.get(units, "Invalid unit name")
+    return switcher.get(unit, "Invalid unit name")
 
 
 def get_abbreviation(phrase):
@@ -133,54 +219,14 @@ def get_abbreviation(phrase):
     return abbreviation
 
 
-def get_windspeed_abbreviation(unit=config.UNITS):
-    return get_abbreviation(units_decoder(unit)['windSpeed'])
-
-
-def get_temperature_letter(unit=config.UNITS):
-    return units_decoder(unit)['temperature'].split(' ')[-1][0].upper()
+def get_windspeed_abbreviation(unit=None):
+    # UNITS can change while running, so it is looked up on each call
+    return get_abbreviation(units_decoder(unit or config.UNITS)['windSpeed'])
 
 
-
-def icon_mapping(icon, size):
-    """
-    https://darksky.net/dev/docs has this to say about icons:
-    icon optional
-    A machine-readable text summary of this data point, suitable for selecting an
-    icon for display. If defined, this property will have one of the following
-    values: clear-day, clear-night, rain, snow, sleet, wind, fog, cloudy,
-    partly-cloudy-day, or partly-cloudy-night. (Developers should ensure that a
-    sensible default is defined, as additional values, such as hail, thunderstorm,
-    or tornado, may be defined in the future.)
-
-    Based on that, this method will map the Dark Sky icon name to the name of an
-    icon in this project.
-    """
-    if icon == 'clear-day':
-        icon_path = 'icons/{}/clear.png'.format(size)
-    elif icon == 'clear-night':
-        icon_path = 'icons/{}/nt_clear.png'.format(size)
-    elif icon == 'rain':
-        icon_path = 'icons/{}/rain.png'.format(size)
-    elif icon == 'snow':
-        icon_path = 'icons/{}/snow.png'.format(size)
-    elif icon == 'sleet':
-        icon_path = 'icons/{}/sleet.png'.format(size)
-    elif icon == 'wind':
-        icon_path = 'icons/alt_icons/{}/wind.png'.format(size)
-    elif icon == 'fog':
-        icon_path = 'icons/{}/fog.png'.format(size)
-    elif icon == 'cloudy':
-        icon_path = 'icons/{}/cloudy.png'.format(size)
-    elif icon == 'partly-cloudy-day':
-        icon_path = 'icons/{}/partlycloudy.png'.format(size)
-    elif icon == 'partly-cloudy-night':
-        icon_path = 'icons/{}/nt_partlycloudy.png'.format(size)
-    else:
-        icon_path = 'icons/{}/unknown.png'.format(size)
-
-    # print(icon_path)
-    return icon_path
+def get_temperature_letter(unit=None):
+    return units_decoder(unit or config.UNITS)['temperature'].split(
+        ' ')[-1][0].upper()
 
 
 # Helper function to which takes seconds and returns (hours, minutes).
@@ -191,6 +237,118 @@ def stot(sec):
     return (hrs, mins % 60)
 
 
+def wrap_text(font, text, width):
+    """ Split text into lines that fit `width` pixels in `font`. """
+    lines = []
+    for paragraph in text.splitlines():
+        line = ''
+        for word in paragraph.split():
+            candidate = line + ' ' + word if line else word
+            if line and font.size(candidate)[0] > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        if line:
+            lines.append(line)
+    return lines
+
+
+# What has to be redone when a setting is changed while running:
+#   layout   - geometry, and the fonts, icons and scrolling text sized by it
+#   icons    - the icon cache
+#   units    - the values on screen, converted without a new request
+#   fetch    - the forecast itself, so a new one is requested
+#   schedule - the refresh scheduler
+#   fetcher  - retry and staleness limits
+#   alerts   - which alerts are urgent
+#   pacing   - frame rate and transitions
+#   restart  - only read at startup
+# Anything else is read as it is used, so the frames are just redrawn.
+RELOAD_ACTIONS = {}
+for _action, _names in (
+        ('layout', ('FULLSCREEN', 'ICON_THEME', 'MARQUEE_SPEED', 'FONT_FILE',
+                    'FONT_DIR', 'FONT_CACHE', 'OPAQUE_RENDER')),
+        ('icons', ('ICON_MODE', 'ICON_CACHE_SIZE')),
+        ('units', ('UNITS',)),
+        ('fetch', ('DS_API_KEY', 'LAT', 'LON', 'LANG')),
+        ('schedule', ('DS_CHECK_INTERVAL', 'DS_MIN_CHECK_INTERVAL',
+                      'DS_MAX_CHECK_INTERVAL', 'DS_DAILY_BUDGET',
+                      'DS_CALL_LOG', 'ADAPTIVE_REFRESH')),
+        ('fetcher', ('FETCH_RETRIES', 'FETCH_BACKOFF', 'STALE_AFTER')),
+        ('alerts', ('ALERT_MIN_SEVERITY',)),
+        ('pacing', ('TARGET_FPS', 'CPU_BUDGET', 'ADAPTIVE_FPS',
+                    'MODE_CROSSFADE', 'CLOCK_SECONDS', 'MARQUEE_FPS')),
+        ('restart', ('VIDEO_DRIVER_CACHE', 'METRICS_PORT', 'METRICS_ADDRESS',
+                     'GPIO_BUTTONS', 'GPIO_BOUNCETIME', 'HISTORY_DB',
+                     'HISTORY_DAYS', 'HISTORY_RAW_DAYS', 'NOWCAST',
+                     'X10_PORT', 'X10_HOUSE', 'X10_UNIT', 'POWER_METHOD',
+                     'QUIET_HOURS', 'POWER_OFF_AT_NIGHT',
+                     'POWER_WAKE_MINUTES', 'DIM_LEVEL', 'SCREENSHOT_DIR',
+                     'SCREENSHOT_FORMAT', 'SCREENSHOT_INTERVAL',
+                     'SCREENSHOT_KEEP', 'CONFIG_RELOAD_INTERVAL',
+                     'LOG_LEVEL', 'LOG_FILE', 'LOG_MAX_BYTES', 'LOG_BACKUPS',
+                     'LOG_SYSLOG', 'LOG_SYSLOG_LEVEL', 'LOG_CONSOLE',
+                     'LOG_RATE_LIMIT', 'MEMORY_CHECK_INTERVAL',
+                     'MEMORY_RSS_LIMIT', 'MEMORY_LIMIT_ACTION',
+                     'MEMORY_DETAIL', 'MEMORY_TOP'))):
+    RELOAD_ACTIONS.update(dict.fromkeys(_names, _action))
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_config(settings):
+    """ Problems with a new set of settings, as a list of messages. """
+    checks = (
+        ('DS_API_KEY', lambda value: isinstance(value, str) and value,
+         'an API key'),
+        ('LAT', lambda value: is_number(value) and -90 <= value <= 90,
+         'a latitude'),
+        ('LON', lambda value: is_number(value) and -180 <= value <= 180,
+         'a longitude'),
+        ('UNITS', lambda value: value in units.SCALES,
+         'one of ' + ', '.join(sorted(units.SCALES))),
+        ('LANG', lambda value: isinstance(value, str) and value,
+         'a language code'),
+        ('DS_CHECK_INTERVAL', lambda value: is_number(value) and value > 0,
+         'a number of seconds'),
+        ('FULLSCREEN', lambda value: value in (True, False), 'True or False'),
+        ('LARGE_ICON_OFFSET', is_number, 'a number'),
+    )
+    optional_checks = (
+        ('DS_MIN_CHECK_INTERVAL', lambda value: is_number(value) and value > 0,
+         'a number of seconds'),
+        ('DS_MAX_CHECK_INTERVAL', lambda value: is_number(value) and value > 0,
+         'a number of seconds'),
+        ('DS_DAILY_BUDGET', lambda value: is_number(value) and value > 0,
+         'a number of calls'),
+        ('TARGET_FPS', lambda value: is_number(value) and value > 0,
+         'a number of frames'),
+        ('MARQUEE_FPS', lambda value: is_number(value) and value >= 0,
+         'a number of frames'),
+        ('ICON_THEME', lambda value: value in iconthemes.THEMES,
+         'one of ' + ', '.join(sorted(iconthemes.THEMES))),
+        ('ICON_MODE', lambda value: value in iconcache.MODES,
+         'one of ' + ', '.join(iconcache.MODES)),
+        ('ICON_CACHE_SIZE', lambda value: is_number(value) and value >= 1,
+         'a number of icons'),
+        ('ALERT_MIN_SEVERITY', lambda value: value in alerts.SEVERITIES,
+         'one of ' + ', '.join(alerts.SEVERITIES)),
+    )
+    problems = []
+    for required, group in ((True, checks), (False, optional_checks)):
+        for name, valid, expected in group:
+            if name not in settings:
+                if required:
+                    problems.append('{0} is missing'.format(name))
+            elif not valid(settings[name]):
+                problems.append('{0} = {1!r}, expected {2}'.format(
+                    name, settings[name], expected))
+    return problems
+
+
 ###############################################################################
 class MyDisplay:
     screen = None
@@ -199,46 +357,63 @@ class MyDisplay:
     def __init__(self):
         "Ininitializes a new pygame screen using the framebuffer"
         if platform.system() == 'Darwin':
-            pygame.display.init()
+            with STARTUP.phase('driver init'):
+                pygame.display.init()
             driver = pygame.display.get_driver()
-            print('Using the {0} driver.'.format(driver))
+            LOG.info('Using the %s driver.', driver)
         else:
             # Based on "Python GUI in Linux frame buffer"
             # http://www.karoltomala.com/blog/?p=679
             disp_no = os.getenv("DISPLAY")
             if disp_no:
-                print("X Display = {0}".format(disp_no))
-                syslog.syslog("X Display = {0}".format(disp_no))
+                LOG.info('X Display = %s', disp_no)
 
             # Check which frame buffer drivers are available
             # Start with fbcon since directfb hangs with composite output
             drivers = ['x11', 'fbcon', 'directfb', 'svgalib']
+            # Try the driver that worked last time first, so a
+            # framebuffer-only Pi doesn't wait for x11 to fail every start
+            driver_cache = getattr(config, 'VIDEO_DRIVER_CACHE',
+                                   'video_driver')
+            cached_driver = startup.load_driver(driver_cache)
+            if cached_driver:
+                if cached_driver in drivers:
+                    drivers.remove(cached_driver)
+                drivers.insert(0, cached_driver)
+            driver_override = os.getenv('SDL_VIDEODRIVER')
             found = False
-            for driver in drivers:
-                # Make sure that SDL_VIDEODRIVER is set
-                if not os.getenv('SDL_VIDEODRIVER'):
-                    os.putenv('SDL_VIDEODRIVER', driver)
-                try:
-                    pygame.display.init()
-                except pygame.error:
-                    print('Driver: {0} failed.'.format(driver))
-                    syslog.syslog('Driver: {0} failed.'.format(driver))
-                    continue
-                found = True
-                break
+            with STARTUP.phase('driver init'):
+                for driver in drivers:
+                    # Make sure that SDL_VIDEODRIVER is set
+                    if not driver_override:
+                        os.putenv('SDL_VIDEODRIVER', driver)
+                    try:
+                        pygame.display.init()
+                    except pygame.error:
+                        LOG.warning('Driver: %s failed.', driver)
+                        continue
+                    found = True
+                    break
 
             if not found:
                 raise Exception('No suitable video driver found!')
+            if not driver_override and driver != cached_driver:
+                startup.save_driver(driver_cache, driver)
 
         size = (pygame.display.Info().current_w,
                 pygame.display.Info().current_h)
-        print("Framebuffer Size: %d x %d" % (size[0], size[1]))
-        syslog.syslog("Framebuffer Size: %d x %d" % (size[0], size[1]))
-        self.screen = pygame.display.set_mode(size, pygame.FULLSCREEN)
+        # Match the framebuffer's depth, so the final blit to the screen
+        # needs no pixel format conversion
+        depth = pygame.display.Info().bitsize
+        LOG.info('Framebuffer Size: %d x %d, %d bit', size[0], size[1], depth)
+        with STARTUP.phase('set_mode'):
+            self.screen = pygame.display.set_mode(size, pygame.FULLSCREEN,
+                                                  depth)
         # Clear the screen to start
         self.screen.fill((0, 0, 0))
         # Initialise font support
-        pygame.font.init()
+        with STARTUP.phase('font init'):
+            pygame.font.init()
         # Render the screen
         pygame.mouse.set_visible(0)
         pygame.display.update()
@@ -246,6 +421,95 @@ class MyDisplay:
         # for fontname in pygame.font.get_fonts():
         #        print(fontname)
 
+        self.set_layout()
+        self.subwindow_text_height = 0.055
+        self.time_date_text_height = 0.115
+        self.time_date_small_text_height = 0.075
+        self.time_date_y_position = 8
+        self.time_date_small_y_position = 18
+
+        self.last_update_check = 0
+        self.fetch_latency = 0
+        # Set when a changed setting needs a new forecast straight away
+        self.refetch = False
+
+        self.scheduler = self.make_scheduler()
+        API_CALLS_TODAY.set(self.scheduler.calls_today)
+
+        # Retries failed fetches with backoff, pausing after repeated
+        # failures, and only hands back forecasts that validate
+        self.fetcher = fetcher.ForecastFetcher(
+            self.request_forecast, self.process_forecast,
+            getattr(config, 'FETCH_RETRIES', 4),
+            getattr(config, 'FETCH_BACKOFF', 60))
+        self.stale_after = getattr(config, 'STALE_AFTER', 1800)
+
+        # Observed conditions kept for the trend screen
+        self.history = None
+        if getattr(config, 'HISTORY_DB', 'history.sqlite'):
+            self.history = history.History(
+                getattr(config, 'HISTORY_DB', 'history.sqlite'),
+                getattr(config, 'HISTORY_DAYS', 30),
+                getattr(config, 'HISTORY_RAW_DAYS', 2),
+                # Older files hold values in the configured units
+                legacy_units=config.UNITS)
+
+        # Severe weather alerts, picked out of each forecast as it arrives
+        lamp = None
+        if getattr(config, 'X10_PORT', None):
+            lamp = alerts.X10Lamp(config.X10_PORT,
+                                  getattr(config, 'X10_HOUSE', 'A'),
+                                  getattr(config, 'X10_UNIT', '1'))
+        self.alerts = alerts.AlertTracker(
+            getattr(config, 'ALERT_MIN_SEVERITY', 'watch'), lamp)
+
+        # Minute by minute rain for the next hour, where Dark Sky has it.
+        self.nowcast_enabled = getattr(config, 'NOWCAST', False)
+        self.nowcast = None
+
+        self.set_fonts()
+        self.set_icons()
+
+        # Offscreen frame per mode, rebuilt by a background thread whenever
+        # the forecast changes. Fonts are not safe to use from two threads
+        # at once, so all text rendering holds render_lock.
+        self.frames = {}
+        # The modes that show each line of scrolling text
+        self.marquee_modes = {'summary': 'dh', 'alert': 'dh', 'daily': 'g'}
+        self.render_lock = threading.RLock()
+        self.frames_wanted = threading.Event()
+        self.frame_builder = threading.Thread(target=self.build_frames,
+                                              name='frames', daemon=True)
+        self.frame_builder.start()
+        self.displayed_mode = None
+        self.crossfade = getattr(config, 'MODE_CROSSFADE', 0)
+        # Seconds show_frame() spent waiting between crossfade steps
+        self.paused = 0.0
+
+        # How often frames are drawn; may slow down to stay in CPU budget
+        self.governor = governor.FrameGovernor(
+            getattr(config, 'TARGET_FPS', 1),
+            getattr(config, 'CPU_BUDGET', 0.25),
+            getattr(config, 'ADAPTIVE_FPS', True))
+        self.clock_seconds = getattr(config, 'CLOCK_SECONDS', False)
+        self.marquee_fps = getattr(config, 'MARQUEE_FPS', 15)
+
+        # Screen sleep schedule
+        self.power = power.PowerManager(
+            getattr(config, 'POWER_METHOD', 'blank'),
+            getattr(config, 'QUIET_HOURS', None),
+            getattr(config, 'POWER_OFF_AT_NIGHT', False),
+            getattr(config, 'POWER_WAKE_MINUTES', 5),
+            getattr(config, 'DIM_LEVEL', 0.3))
+
+        self.screen_capture = screencap.ScreenCapture(
+            getattr(config, 'SCREENSHOT_DIR', '.'),
+            getattr(config, 'SCREENSHOT_FORMAT', 'jpeg'),
+            getattr(config, 'SCREENSHOT_INTERVAL', 0),
+            getattr(config, 'SCREENSHOT_KEEP', 0))
+
+    def set_layout(self):
+        """ Screen geometry, and the icon theme and text boxes sized by it. """
         if config.FULLSCREEN:
             self.xmax = pygame.display.Info().current_w - 35
             self.ymax = pygame.display.Info().current_h - 5
@@ -257,77 +521,385 @@ class MyDisplay:
             self.xmax = 480 - 35
             self.ymax = 320 - 5
             self.icon_size = '64'
-        self.subwindow_text_height = 0.055
-        self.time_date_text_height = 0.115
-        self.time_date_small_text_height = 0.075
-        self.time_date_y_position = 8
-        self.time_date_small_y_position = 18
-
-        self.last_update_check = 0
+        # Every icon file of the theme is checked here, once
+        self.icon_theme = iconthemes.IconTheme(
+            getattr(config, 'ICON_THEME', 'icons'), self.icon_size)
+        # Lines of text that scroll in place when they don't fit their box
+        speed = getattr(config, 'MARQUEE_SPEED', 60)
+        line_height = int(self.ymax * 0.05)
+        self.marquees = {
+            'summary': marquee.Marquee(
+                (self.xmax * 0.03, self.ymax * 0.444, self.xmax * 0.46,
+                 line_height), speed),
+            'alert': marquee.Marquee(
+                (self.xmax * 0.52, self.ymax * 0.444, self.xmax * 0.46,
+                 line_height), speed),
+            'daily': marquee.Marquee(
+                (self.xmax * 0.04, self.ymax * 0.92, self.xmax * 0.92,
+                 line_height), speed),
+        }
+
+    def set_fonts(self):
+        # Fonts and icons are loaded once and reused by every frame. Font
+        # names are resolved to files directly rather than with SysFont,
+        # which scans every system font on the first call.
+        self.font_resolver = fonts.FontResolver(
+            getattr(config, 'FONT_FILE', None),
+            getattr(config, 'FONT_DIR', 'fonts'),
+            getattr(config, 'FONT_CACHE', 'font_paths.json'))
+        # Everything is drawn on black, so text and icons can be made
+        # opaque in the display format and blitted without alpha blending
+        self.opaque = getattr(config, 'OPAQUE_RENDER', True)
+        self.fonts = {}
+
+    def set_icons(self):
+        # ICON_MODE trades icon memory for decode time on small devices
+        self.icons = iconcache.IconCache(
+            self.load_icon, getattr(config, 'ICON_MODE', 'full'),
+            getattr(config, 'ICON_CACHE_SIZE', 8))
+        ICON_BYTES.set(0, form='decoded')
+        ICON_BYTES.set(0, form='compressed')
+
+    def make_scheduler(self):
+        """
+        When to check for a new forecast, and the persistent count of API
+        calls made today.
+        """
+        return scheduler.RefreshScheduler(
+            config.DS_CHECK_INTERVAL,
+            getattr(config, 'DS_MIN_CHECK_INTERVAL', 120),
+            getattr(config, 'DS_MAX_CHECK_INTERVAL', 1800),
+            getattr(config, 'DS_DAILY_BUDGET', 900),
+            getattr(config, 'DS_CALL_LOG', 'api_calls.json'),
+            5 if config.UNITS == 'us' else 3,
+            adaptive=getattr(config, 'ADAPTIVE_REFRESH', True))
+
+    @property
+    def nowcast_threshold(self):
+        """ Light rain, 0.1 mm/h, in the configured units. """
+        return 0.004 if config.UNITS == 'us' else 0.1
 
     def __del__(self):
         "Destructor to make sure pygame shuts down, etc."
 
-    def get_forecast(self):
-        if (time.time() - self.last_update_check) > config.DS_CHECK_INTERVAL:
+    def get_font(self, font_name, size):
+        key = (font_name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            FONT_CACHE.inc(result='miss')
+            font_class = fonts.OpaqueFont if self.opaque else pygame.font.Font
+            font = self.fonts[key] = font_class(
+                self.font_resolver.resolve(font_name), size)
+        else:
+            FONT_CACHE.inc(result='hit')
+        return font
+
+    def load_icon(self, source):
+        image = pygame.image.load(source).convert_alpha()
+        if not self.opaque and self.icons.mode != 'palette':
+            return image
+        # Composite onto the panel background once, up front
+        icon = pygame.Surface(image.get_size()).convert()
+        icon.fill(fonts.OpaqueFont.background)
+        icon.blit(image, (0, 0))
+        return icon
+
+    def get_icon(self, icon_path):
+        icon, hit = self.icons.get(icon_path)
+        if hit:
+            ICON_CACHE.inc(result='hit')
+        else:
+            ICON_CACHE.inc(result='miss')
+            decoded, compressed = self.icons.footprint()
+            ICON_BYTES.set(decoded, form='decoded')
+            ICON_BYTES.set(compressed, form='compressed')
+        return icon
+
+    def count_api_call(self):
+        self.scheduler.record_call()
+        API_CALLS.inc()
+        API_CALLS_TODAY.set(self.scheduler.calls_today)
+
+    def fetch_interval(self):
+        """ Seconds between forecast checks, or None to not check. """
+        if self.power.blanked:
+            return getattr(config, 'POWER_OFF_FETCH_INTERVAL', 3600) or None
+        return self.scheduler.interval
+
+    def request_forecast(self):
+        self.count_api_call()
+        fetch_start = time.monotonic()
+        try:
+            return forecast(config.DS_API_KEY,
+                            config.LAT,
+                            config.LON,
+                            timeout=getattr(config, 'DS_TIMEOUT', 10),
+                            exclude=(None if self.nowcast_enabled
+                                     else 'minutely'),
+                            units=units.CANONICAL,
+                            lang=config.LANG)
+        finally:
+            self.fetch_latency = time.monotonic() - fetch_start
+            FETCH_SECONDS.observe(self.fetch_latency)
+
+    def graph_rect(self):
+        """ Plot area of the hourly graph screen. """
+        return pygame.Rect(int(self.xmax * 0.1), int(self.ymax * 0.25),
+                           int(self.xmax * 0.8), int(self.ymax * 0.6))
+
+    def hourly_graph_points(self, weather):
+        """
+        Screen coordinates for the whole hourly block (48 hours from Dark
+        Sky), worked out once per forecast so drawing the graph is only a
+        couple of pygame.draw calls.
+        """
+        hours = weather.hourly.data
+        times = [hour.time for hour in hours]
+        temperatures = [hour.temperature for hour in hours]
+        rain_chances = [getattr(hour, 'precipProbability', 0) or 0
+                        for hour in hours]
+        rect = self.graph_rect()
+        start, end = times[0], times[-1]
+        x_scale = rect.width / float((end - start) or 1)
+        # Whole degrees, at least 10 apart, so the axis labels are tidy
+        low = math.floor(min(temperatures))
+        high = max(math.ceil(max(temperatures)), low + 10)
+        y_scale = rect.height / float(high - low)
+        xs = [rect.left + (hour_time - start) * x_scale for hour_time in times]
+        return {
+            'start': start,
+            'end': end,
+            'x_scale': x_scale,
+            'low': low,
+            'high': high,
+            'times': times,
+            'temperature': [
+                (x, rect.bottom - (temperature - low) * y_scale)
+                for x, temperature in zip(xs, temperatures)],
+            'rain': [(x, rect.bottom - chance * rect.height)
+                     for x, chance in zip(xs, rain_chances)],
+        }
+
+    def process_forecast(self, weather):
+        """
+        Work out everything derived from a new forecast without touching
+        the current data, so a bad payload can't leave it half updated.
+        """
+        # Fetched in SI whatever the display shows; convert it here
+        units.convert(weather, config.UNITS)
+        sunset_today = datetime.datetime.fromtimestamp(
+            weather.daily[0].sunsetTime)
+        if datetime.datetime.now() < sunset_today:
+            index = 0
+            sr_suffix = 'today'
+            ss_suffix = 'tonight'
+        else:
+            index = 1
+            sr_suffix = 'tomorrow'
+            ss_suffix = 'tomorrow'
+
+        sunrise = weather.daily[index].sunriseTime
+        sunrise_string = datetime.datetime.fromtimestamp(
+            sunrise).strftime("%I:%M %p {}").format(sr_suffix)
+        sunset = weather.daily[index].sunsetTime
+        sunset_string = datetime.datetime.fromtimestamp(
+            sunset).strftime("%I:%M %p {}").format(ss_suffix)
+
+        next_hour = None
+        if self.nowcast_enabled and hasattr(weather, 'minutely'):
+            next_hour = nowcast.Nowcast(weather.minutely,
+                                        self.nowcast_threshold)
+            NOWCAST_PARSE_SECONDS.observe(next_hour.parse_seconds)
+
+        # start with saying we don't need an umbrella
+        take_umbrella = False
+        icon_now = weather.icon
+        icon_today = weather.daily[0].icon
+        if icon_now == 'rain' or icon_today == 'rain':
+            take_umbrella = True
+        elif next_hour is not None and next_hour.rain_start is not None:
+            # the nowcast sees rain within the hour
+            take_umbrella = True
+        else:
+            # determine if an umbrella is needed during daylight hours
+            curr_date = datetime.datetime.today().date()
+            sr = datetime.datetime.fromtimestamp(weather.daily[0].sunriseTime)
+            ss = datetime.datetime.fromtimestamp(weather.daily[0].sunsetTime)
+            for hour in weather.hourly:
+                hr = datetime.datetime.fromtimestamp(hour.time)
+                rain_chance = getattr(hour, 'precipProbability', 0) or 0
+                is_today = hr.date() == curr_date
+                is_daylight_hr = hr >= sr and hr <= ss
+                if is_today and is_daylight_hr and rain_chance >= .25:
+                    take_umbrella = True
+                    break
+
+        return {
+            'hourly_graph': self.hourly_graph_points(weather),
+            'nowcast': next_hour,
+            'alerts': alerts.extract(weather),
+            'weather': weather,
+            'sunrise': sunrise,
+            'sunrise_string': sunrise_string,
+            'sunset': sunset,
+            'sunset_string': sunset_string,
+            'take_umbrella': take_umbrella,
+        }
+
+    def get_forecast(self, force=False):
+        """
+        Fetch a new forecast if one is due. `force` skips the schedule,
+        daily budget and backoff, for the fetch at startup. Returns False
+        if a fetch was attempted and failed.
+        """
+        if not force:
+            if self.refetch:
+                # The location or language changed: fetch now, if any of
+                # today's budget is left
+                due = self.scheduler.remaining() > 0
+            else:
+                interval = self.fetch_interval()
+                due = interval is not None and \
+                    self.scheduler.due(self.last_update_check, interval)
+            if not due or not self.fetcher.ready():
+                return True
+        try:
+            update = self.fetcher.fetch()
+        except fetcher.FetchError as e:
+            FETCH_ERRORS.inc(type=type(e).__name__)
+            FETCH_CIRCUIT_OPEN.set(
+                0 if self.fetcher.state == self.fetcher.CLOSED else 1)
+            # Repeats of the same failure are only logged once a minute
+            LOG.warning('Forecast fetch failed (%s): %s', type(e).__name__, e,
+                        extra=weatherlog.fields(
+                            error=type(e).__name__,
+                            latency='{0:.3f}'.format(self.fetch_latency),
+                            state=self.fetcher.state))
+            return False
+        except Exception as e:
+            # A forecast process_forecast() can't handle, or a bug in it:
+            # keep showing the last one and try again next interval.
+            FETCH_ERRORS.inc(type=type(e).__name__)
+            FETCH_CIRCUIT_OPEN.set(0)
             self.last_update_check = time.time()
+            self.refetch = False
+            LOG.exception('Unable to use the new forecast, keeping the '
+                          'last one.')
+            return False
+        FETCH_CIRCUIT_OPEN.set(0)
+
+        # Only validated data gets here; swap it all in at once, under
+        # render_lock so the frame builder never sees half of it.
+        with self.render_lock:
+            self.weather = update['weather']
+            self.sunrise = update['sunrise']
+            self.sunrise_string = update['sunrise_string']
+            self.sunset = update['sunset']
+            self.sunset_string = update['sunset_string']
+            self.take_umbrella = update['take_umbrella']
+            self.hourly_graph = update['hourly_graph']
+            self.nowcast = update['nowcast']
+            self.alerts.update(update['alerts'])
+        self.last_update_check = time.time()
+        self.refetch = False
+        if self.history is not None:
+            self.history.record(self.weather)
+        self.invalidate_frames()
+
+        interval = self.scheduler.plan(self.weather,
+                                       daylight(self.weather)[0])
+        LOG.info('Next forecast check in %d seconds (%s).', interval,
+                 self.scheduler.reason,
+                 extra=weatherlog.fields(
+                     latency='{0:.3f}'.format(self.fetch_latency)))
+        return True
+
+    def apply_config(self, changes):
+        """
+        Switch to settings changed in config.py, redoing only what depends
+        on them. Called between frames and done under render_lock, so no
+        frame is drawn with half of the new settings; the screen itself is
+        left as it is. Settings that pass validate_config() can still fail
+        here (a font that won't load, say); then the old settings and
+        everything made from them are put back. Returns True if the new
+        settings were applied.
+        """
+        actions = set()
+        for name in sorted(changes):
+            action = RELOAD_ACTIONS.get(name, 'frames')
+            actions.add(action)
+            if action == 'restart':
+                LOG.warning('%s changed; restart to apply it.', name)
+        LOG.info('Applying new settings: %s', ', '.join(sorted(changes)))
+        with self.render_lock:
+            previous = {name: getattr(config, name, configwatch.REMOVED)
+                        for name in changes}
+            state = dict(vars(self))
+            settings = (self.fetcher.retries, self.fetcher.backoff,
+                        self.alerts.min_severity)
             try:
-                self.weather = forecast(config.DS_API_KEY,
-                                        config.LAT,
-                                        config.LON,
-                                        exclude='minutely',
-                                        units=config.UNITS,
-                                        lang=config.LANG)
-
-                sunset_today = datetime.datetime.fromtimestamp(
-                    self.weather.daily[0].sunsetTime)
-                if datetime.datetime.now() < sunset_today:
-                    index = 0
-                    sr_suffix = 'today'
-                    ss_suffix = 'tonight'
-                else:
-                    index = 1
-                    sr_suffix = 'tomorrow'
-                    ss_suffix = 'tomorrow'
-
-                self.sunrise = self.weather.daily[index].sunriseTime
-                self.sunrise_string = datetime.datetime.fromtimestamp(
-                    self.sunrise).strftime("%I:%M %p {}").format(sr_suffix)
-                self.sunset = self.weather.daily[index].sunsetTime
-                self.sunset_string = datetime.datetime.fromtimestamp(
-                    self.sunset).strftime("%I:%M %p {}").format(ss_suffix)
-
-                # start with saying we don't need an umbrella
-                self.take_umbrella = False
-                icon_now = self.weather.icon
-                icon_today = self.weather.daily[0].icon
-                if icon_now == 'rain' or icon_today == 'rain':
-                    self.take_umbrella = True
-                else:
-                    # determine if an umbrella is needed during daylight hours
-                    curr_date = datetime.datetime.today().date()
-                    for hour in self.weather.hourly:
-                        hr = datetime.datetime.fromtimestamp(hour.time)
-                        sr = datetime.datetime.fromtimestamp(
-                            self.weather.daily[0].sunriseTime)
-                        ss = datetime.datetime.fromtimestamp(
-                            self.weather.daily[0].sunsetTime)
-                        rain_chance = hour.precipProbability
-                        is_today = hr.date() == curr_date
-                        is_daylight_hr = hr >= sr and hr <= ss
-                        if is_today and is_daylight_hr and rain_chance >= .25:
-                            self.take_umbrella = True
-                            break
-
-            except requests.exceptions.RequestException as e:
-                print('Request exception: ' + str(e))
-                return False
-            except AttributeError as e:
-                print('Attribute error: ' + str(e))
+                self._apply_config(changes, actions)
+            except Exception:
+                LOG.exception('Unable to apply the new settings, keeping '
+                              'the old ones.')
+                configwatch.update(config, previous)
+                for name in set(vars(self)) - set(state):
+                    delattr(self, name)
+                for name, value in state.items():
+                    if getattr(self, name) is not value:
+                        setattr(self, name, value)
+                (self.fetcher.retries, self.fetcher.backoff,
+                 self.alerts.min_severity) = settings
+                # Converted in place, so convert it back
+                units.convert(self.weather, config.UNITS)
                 return False
+        CONFIG_RELOADS.inc()
+        self.invalidate_frames()
+        self.governor.force()
         return True
 
-    def display_conditions_line(self, label, cond, is_temp, multiplier=None):
+    def _apply_config(self, changes, actions):
+        configwatch.update(config, changes)
+        if 'layout' in actions:
+            self.set_layout()
+            self.set_fonts()
+        if actions & {'layout', 'icons'}:
+            self.set_icons()
+        if 'units' in actions:
+            # Same forecast, new units: no request needed
+            units.convert(self.weather, config.UNITS)
+            if self.nowcast is not None:
+                self.nowcast = nowcast.Nowcast(self.weather.minutely,
+                                               self.nowcast_threshold)
+        if actions & {'layout', 'units'}:
+            self.hourly_graph = self.hourly_graph_points(self.weather)
+        if actions & {'schedule', 'units'}:
+            self.scheduler = self.make_scheduler()
+            self.scheduler.plan(self.weather, daylight(self.weather)[0])
+        if 'fetcher' in actions:
+            self.fetcher.retries = getattr(config, 'FETCH_RETRIES', 4)
+            self.fetcher.backoff = getattr(config, 'FETCH_BACKOFF', 60)
+            self.stale_after = getattr(config, 'STALE_AFTER', 1800)
+        if 'alerts' in actions:
+            self.alerts.min_severity = getattr(
+                config, 'ALERT_MIN_SEVERITY', 'watch')
+        if 'pacing' in actions:
+            self.governor = governor.FrameGovernor(
+                getattr(config, 'TARGET_FPS', 1),
+                getattr(config, 'CPU_BUDGET', 0.25),
+                getattr(config, 'ADAPTIVE_FPS', True))
+            self.crossfade = getattr(config, 'MODE_CROSSFADE', 0)
+            self.clock_seconds = getattr(config, 'CLOCK_SECONDS', False)
+            self.marquee_fps = getattr(config, 'MARQUEE_FPS', 15)
+        if 'fetch' in actions:
+            self.refetch = True
+
+    def data_age(self):
+        """ Seconds since the last successful forecast fetch. """
+        return time.time() - self.last_update_check
+
+    def display_conditions_line(self, surface, label, cond, is_temp,
+                                multiplier=None):
         y_start_position = 0.17
         line_spacing_gap = 0.065
         conditions_text_height = 0.05
@@ -343,35 +915,46 @@ class MyDisplay:
         else:
             y_start = (y_start_position + line_spacing_gap * multiplier)
 
-        conditions_font = pygame.font.SysFont(
-            font_name, int(self.ymax * conditions_text_height), bold=1)
+        conditions_font = self.get_font(
+            font_name, int(self.ymax * conditions_text_height))
 
         txt = conditions_font.render(str(label), True, text_color)
 
-        self.screen.blit(
+        surface.blit(
             txt, (self.xmax * x_start_position, self.ymax * y_start))
 
         txt = conditions_font.render(str(cond), True, text_color)
-        self.screen.blit(txt, (self.xmax * second_column_x_start_position,
-                               self.ymax * y_start))
+        surface.blit(txt, (self.xmax * second_column_x_start_position,
+                           self.ymax * y_start))
 
         if is_temp:
             txt_x = txt.get_size()[0]
-            degree_font = pygame.font.SysFont(
-                font_name, int(self.ymax * degree_symbol_height), bold=1)
+            degree_font = self.get_font(
+                font_name, int(self.ymax * degree_symbol_height))
             degree_txt = degree_font.render(UNICODE_DEGREE, True, text_color)
-            self.screen.blit(degree_txt, (
+            surface.blit(degree_txt, (
                 self.xmax * second_column_x_start_position + txt_x * 1.01,
                 self.ymax * (y_start + degree_symbol_y_offset)))
             degree_letter = conditions_font.render(get_temperature_letter(),
                                                    True, text_color)
             degree_letter_x = degree_letter.get_size()[0]
-            self.screen.blit(degree_letter, (
+            surface.blit(degree_letter, (
                 self.xmax * second_column_x_start_position +
                 txt_x + degree_letter_x * 1.01,
                 self.ymax * (y_start + degree_symbol_y_offset)))
 
-    def display_subwindow(self, data, day, c_times):
+    def is_night(self, data):
+        """ True for an hourly forecast outside that day's daylight. """
+        if hasattr(data, 'sunriseTime'):
+            # Daily forecasts always get the daytime icon
+            return False
+        date = datetime.date.fromtimestamp(data.time)
+        for day in self.weather.daily:
+            if datetime.date.fromtimestamp(day.time) == date:
+                return not day.sunriseTime <= data.time <= day.sunsetTime
+        return False
+
+    def display_subwindow(self, surface, data, day, c_times):
         subwindow_centers = 0.125
         subwindows_y_start_position = 0.530
         line_spacing_gap = 0.065
@@ -380,17 +963,17 @@ class MyDisplay:
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        forecast_font = pygame.font.SysFont(
-            font_name, int(self.ymax * self.subwindow_text_height), bold=1)
-        rpfont = pygame.font.SysFont(
-            font_name, int(self.ymax * rain_present_text_height), bold=1)
+        forecast_font = self.get_font(
+            font_name, int(self.ymax * self.subwindow_text_height))
+        rpfont = self.get_font(
+            font_name, int(self.ymax * rain_present_text_height))
 
         txt = forecast_font.render(day, True, text_color)
         (txt_x, txt_y) = txt.get_size()
-        self.screen.blit(txt, (self.xmax *
-                               (subwindow_centers * c_times) - txt_x / 2,
-                               self.ymax * (subwindows_y_start_position +
-                                            line_spacing_gap * 0)))
+        surface.blit(txt, (self.xmax *
+                           (subwindow_centers * c_times) - txt_x / 2,
+                           self.ymax * (subwindows_y_start_position +
+                                        line_spacing_gap * 0)))
         if hasattr(data, 'temperatureLow'):
             txt = forecast_font.render(
                 str(int(round(data.temperatureLow))) +
@@ -405,80 +988,106 @@ class MyDisplay:
                 UNICODE_DEGREE + get_temperature_letter(),
                 True, text_color)
         (txt_x, txt_y) = txt.get_size()
-        self.screen.blit(txt, (self.xmax *
-                               (subwindow_centers * c_times) - txt_x / 2,
-                               self.ymax * (subwindows_y_start_position +
-                                            line_spacing_gap * 5)))
+        surface.blit(txt, (self.xmax *
+                           (subwindow_centers * c_times) - txt_x / 2,
+                           self.ymax * (subwindows_y_start_position +
+                                        line_spacing_gap * 5)))
         # rtxt = forecast_font.render('Rain:', True, lc)
-        # self.screen.blit(rtxt, (ro,self.ymax*(wy+gp*5)))
+        # surface.blit(rtxt, (ro,self.ymax*(wy+gp*5)))
         rptxt = rpfont.render(
             str(int(round(data.precipProbability * 100))) + '%',
             True, text_color)
         (txt_x, txt_y) = rptxt.get_size()
-        self.screen.blit(rptxt, (self.xmax *
-                                 (subwindow_centers * c_times) - txt_x / 2,
-                                 self.ymax * (subwindows_y_start_position +
-                                              line_spacing_gap *
-                                              rain_percent_line_offset)))
-        icon = pygame.image.load(
-            icon_mapping(data.icon, self.icon_size)).convert_alpha()
+        surface.blit(rptxt, (self.xmax *
+                             (subwindow_centers * c_times) - txt_x / 2,
+                             self.ymax * (subwindows_y_start_position +
+                                          line_spacing_gap *
+                                          rain_percent_line_offset)))
+        # The "chance of" variants for rain, snow etc. below 50%
+        icon = self.get_icon(self.icon_theme.path(
+            data.icon, self.is_night(data),
+            getattr(data, 'precipProbability', 1) < 0.5))
         (icon_size_x, icon_size_y) = icon.get_size()
         if icon_size_y < 90:
             icon_y_offset = (90 - icon_size_y) / 2
         else:
             icon_y_offset = config.LARGE_ICON_OFFSET
 
-        self.screen.blit(icon, (self.xmax *
-                                (subwindow_centers * c_times) -
-                                icon_size_x / 2,
-                                self.ymax *
-                                (subwindows_y_start_position +
-                                 line_spacing_gap
-                                 * 1.2) + icon_y_offset))
+        surface.blit(icon, (self.xmax *
+                            (subwindow_centers * c_times) -
+                            icon_size_x / 2,
+                            self.ymax *
+                            (subwindows_y_start_position +
+                             line_spacing_gap
+                             * 1.2) + icon_y_offset))
 
-    def disp_summary(self):
-        y_start_position = 0.444
+    def disp_summary(self, surface):
         conditions_text_height = 0.04
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        conditions_font = pygame.font.SysFont(
-            font_name, int(self.ymax * conditions_text_height), bold=1)
-        txt = conditions_font.render(self.weather.summary, True, text_color)
-        txt_x = txt.get_size()[0]
-        x = self.xmax * 0.27 - (txt_x * 1.02) / 2
-        self.screen.blit(txt, (x, self.ymax * y_start_position))
+        conditions_font = self.get_font(
+            font_name, int(self.ymax * conditions_text_height))
+        summary = self.marquees['summary']
+        summary.set_text(conditions_font, self.weather.summary, text_color)
+        # Text that fits is drawn once here; otherwise it scrolls
+        if not summary.scrolling:
+            summary.draw(surface)
 
-    def disp_umbrella_info(self, umbrella_txt):
+    def disp_umbrella_info(self, surface, umbrella_txt):
         x_start_position = 0.52
         y_start_position = 0.444
         conditions_text_height = 0.04
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        conditions_font = pygame.font.SysFont(
-            font_name, int(self.ymax * conditions_text_height), bold=1)
+        conditions_font = self.get_font(
+            font_name, int(self.ymax * conditions_text_height))
         txt = conditions_font.render(umbrella_txt, True, text_color)
-        self.screen.blit(txt, (
+        surface.blit(txt, (
             self.xmax * x_start_position,
             self.ymax * y_start_position))
 
-    def disp_weather(self):
-        # Fill the screen with black
-        self.screen.fill((0, 0, 0))
-        xmin = 10
-        lines = 5
-        line_color = (255, 255, 255)
+    # Daily and hourly modes share everything but the bottom strip, so a
+    # frame is composed from cached stages that are only re-rendered when
+    # new forecast data arrives:
+    #   panel  - border plus current conditions, shared by both modes
+    #   strips - the four forecast subwindows for 'd' (days) or 'h' (hours)
+    #   frames - panel with a strip drawn over it, one per mode, plus the
+    #            static part of the info screen
+    # Drawing a frame is then one blit plus the time and date, and a mode
+    # switch costs the same as any other frame.
+    ####################################################################
+    def invalidate_frames(self):
+        """ Ask the background builder to re-render every mode frame. """
+        self.frames_wanted.set()
+
+    def build_frames(self):
+        while True:
+            self.frames_wanted.wait()
+            self.frames_wanted.clear()
+            # The previous frames stay on screen until the new set is ready,
+            # or for good if it can't be built; the builder keeps going so
+            # the next forecast can replace them
+            try:
+                self.frames = self.render_frames()
+            except Exception:
+                FRAME_BUILD_ERRORS.inc()
+                LOG.exception('Unable to build frames, keeping the old ones.')
+
+    def render_panel(self):
         text_color = (255, 255, 255)
         font_name = "freesans"
 
-        self.draw_screen_border(line_color, xmin, lines)
-        self.disp_time_date(font_name, text_color)
-        self.disp_current_temp(font_name, text_color)
-        self.disp_summary()
+        panel = pygame.Surface(self.screen.get_size()).convert()
+        # Fill the panel with black
+        panel.fill((0, 0, 0))
+
+        self.disp_current_temp(panel, font_name, text_color)
+        self.disp_summary(panel)
         self.display_conditions_line(
-            'Feels Like:', int(round(self.weather.apparentTemperature)),
-            True)
+            panel, 'Feels Like:',
+            int(round(self.weather.apparentTemperature)), True)
 
         try:
             wind_bearing = self.weather.windBearing
@@ -489,25 +1098,44 @@ class MyDisplay:
             int(round(self.weather.windSpeed))) + \
             ' ' + get_windspeed_abbreviation()
         self.display_conditions_line(
-            'Wind:', wind_txt, False, 1)
+            panel, 'Wind:', wind_txt, False, 1)
 
         self.display_conditions_line(
-            'Humidity:', str(int(round((self.weather.humidity * 100)))) + '%',
-            False, 2)
+            panel, 'Humidity:',
+            str(int(round((self.weather.humidity * 100)))) + '%', False, 2)
 
         # Skipping multiplier 3 (line 4)
 
-        if self.take_umbrella:
+        if self.nowcast is not None and self.nowcast.raining:
+            umbrella_txt = 'Raining now, grab an umbrella!'
+        elif self.nowcast is not None and \
+                self.nowcast.rain_start is not None:
+            umbrella_txt = 'Rain within the hour!'
+        elif self.take_umbrella:
             umbrella_txt = 'Grab your umbrella!'
         else:
             umbrella_txt = 'No umbrella needed today.'
-        self.disp_umbrella_info(umbrella_txt)
 
+        # Urgent alerts take the umbrella's place
+        urgent = [alert for alert in self.alerts.active
+                  if self.alerts.is_urgent(alert)]
+        alert_line = self.marquees['alert']
+        alert_line.set_text(
+            self.get_font(font_name, int(self.ymax * 0.04)),
+            '  /  '.join(alert.title for alert in urgent),
+            SEVERITY_COLORS[urgent[0].severity] if urgent else text_color)
+        if not urgent:
+            self.disp_umbrella_info(panel, umbrella_txt)
+        elif not alert_line.scrolling:
+            alert_line.draw(panel)
+        return panel
+
+    def render_daily_strip(self, surface):
         # Today
         today = self.weather.daily[0]
         today_string = "Today"
         multiplier = 1
-        self.display_subwindow(today, today_string, multiplier)
+        self.display_subwindow(surface, today, today_string, multiplier)
 
         # counts from 0 to 2
         for future_day in range(3):
@@ -515,92 +1143,130 @@ class MyDisplay:
             this_day_no = datetime.datetime.fromtimestamp(this_day.time)
             this_day_string = this_day_no.strftime("%A")
             multiplier += 2
-            self.display_subwindow(this_day, this_day_string, multiplier)
+            self.display_subwindow(surface, this_day, this_day_string,
+                                   multiplier)
 
-        # Update the display
-        pygame.display.update()
-
-    def disp_hourly(self):
-        # Fill the screen with black
-        self.screen.fill((0, 0, 0))
-        xmin = 10
-        lines = 5
-        line_color = (255, 255, 255)
-        text_color = (255, 255, 255)
-        font_name = "freesans"
-
-        self.draw_screen_border(line_color, xmin, lines)
-        self.disp_time_date(font_name, text_color)
-        self.disp_current_temp(font_name, text_color)
-        self.disp_summary()
-        self.display_conditions_line(
-            'Feels Like:', int(round(self.weather.apparentTemperature)),
-            True)
-
-        try:
-            wind_bearing = self.weather.windBearing
-            wind_direction = deg_to_compass(wind_bearing) + ' @ '
-        except AttributeError:
-            wind_direction = ''
-        wind_txt = wind_direction + str(
-            int(round(self.weather.windSpeed))) + \
-            ' ' + get_windspeed_abbreviation()
-        self.display_conditions_line(
-            'Wind:', wind_txt, False, 1)
-
-        self.display_conditions_line(
-            'Humidity:', str(int(round((self.weather.humidity * 100)))) + '%',
-            False, 2)
-
-        # Skipping multiplier 3 (line 4)
-
-        if self.take_umbrella:
-            umbrella_txt = 'Grab your umbrella!'
-        else:
-            umbrella_txt = 'No umbrella needed today.'
-        self.disp_umbrella_info(umbrella_txt)
-
-        # Current hour
-        this_hour = self.weather.hourly[0]
-        this_hour_24_int = int(datetime.datetime.fromtimestamp(
-            this_hour.time).strftime("%H"))
-        if this_hour_24_int <= 11:
-            ampm = 'a.m.'
-        else:
-            ampm = 'p.m.'
-        this_hour_12_int = int(datetime.datetime.fromtimestamp(
-            this_hour.time).strftime("%I"))
-        this_hour_string = "{} {}".format(str(this_hour_12_int), ampm)
+    def render_hourly_strip(self, surface):
+        # Current hour and the three after it
         multiplier = 1
-        self.display_subwindow(this_hour, this_hour_string, multiplier)
-
-        # counts from 0 to 2
-        for future_hour in range(3):
-            this_hour = self.weather.hourly[future_hour + 1]
-            this_hour_24_int = int(datetime.datetime.fromtimestamp(
-                this_hour.time).strftime("%H"))
-            if this_hour_24_int <= 11:
+        for this_hour in self.weather.hourly[:4]:
+            this_hour_time = datetime.datetime.fromtimestamp(this_hour.time)
+            if this_hour_time.hour <= 11:
                 ampm = 'a.m.'
             else:
                 ampm = 'p.m.'
-            this_hour_12_int = int(datetime.datetime.fromtimestamp(
-                this_hour.time).strftime("%I"))
-            this_hour_string = "{} {}".format(str(this_hour_12_int), ampm)
+            this_hour_string = "{} {}".format(
+                int(this_hour_time.strftime("%I")), ampm)
+            self.display_subwindow(surface, this_hour, this_hour_string,
+                                   multiplier)
             multiplier += 2
-            self.display_subwindow(this_hour, this_hour_string, multiplier)
+
+    def render_frames(self):
+        frames = {}
+        with self.render_lock:
+            panel = self.render_panel()
+            for mode, render_strip in (('d', self.render_daily_strip),
+                                       ('h', self.render_hourly_strip)):
+                frame = panel.copy()
+                render_strip(frame)
+                # Border last: opaque text that overflows its box would
+                # otherwise cut through the lines
+                self.draw_screen_border(frame, (255, 255, 255), 10, 5)
+                frames[mode] = frame
+            frames['i'] = self.render_info_frame()
+            frames['g'] = self.render_graph_frame()
+            if self.nowcast_enabled:
+                frames['n'] = self.render_nowcast_frame()
+            frames['a'] = self.render_alert_frame()
+            if self.history is not None:
+                frames['t'] = self.render_trend_frame()
+        return frames
+
+    def show_frame(self, mode):
+        """
+        Put the cached frame for `mode` on the screen, cross-fading from the
+        previous mode's frame if MODE_CROSSFADE is set.
+        """
+        frames = self.frames
+        if mode not in frames:
+            # Nothing built yet (first frame): render it here
+            frames = self.frames = self.render_frames()
+        previous = frames.get(self.displayed_mode)
+        if self.crossfade and previous is not None and \
+                self.displayed_mode != mode:
+            steps = 8
+            frame = frames[mode]
+            for step in range(1, steps):
+                self.screen.blit(previous, (0, 0))
+                frame.set_alpha(255 * step // steps)
+                self.screen.blit(frame, (0, 0))
+                pygame.display.update()
+                self.paused += pygame.time.wait(
+                    int(self.crossfade * 1000 / steps)) / 1000.0
+            frame.set_alpha(None)
+        self.screen.blit(frames[mode], (0, 0))
+        self.displayed_mode = mode
+
+    def take_paused(self):
+        """
+        Seconds spent waiting in crossfades since the last call. Not
+        drawing time, so it is left out of the frame cost the governor
+        paces by.
+        """
+        paused, self.paused = self.paused, 0.0
+        return paused
+
+    def disp_staleness(self, surface):
+        """ Warn in the top box when the forecast is getting old. """
+        age = self.data_age()
+        if not self.stale_after or age < self.stale_after:
+            return
+        stale_font = self.get_font("freesans", int(self.ymax * 0.035))
+        txt = stale_font.render(
+            'Forecast {0} min old'.format(int(age // 60)), True,
+            (255, 96, 96))
+        (txt_x, txt_y) = txt.get_size()
+        surface.blit(txt, (self.xmax - txt_x - 8,
+                           self.ymax * 0.15 - txt_y - 4))
+
+    def scrolling(self, mode):
+        """ True if `mode` shows text that is scrolling. """
+        return any(line.scrolling and mode in self.marquee_modes[name]
+                   for name, line in self.marquees.items())
+
+    def draw_marquees(self, mode):
+        """ Move along the scrolling text shown in `mode`. """
+        now = time.time()
+        for name, line in self.marquees.items():
+            if line.scrolling and mode in self.marquee_modes[name]:
+                line.draw(self.screen, now)
+
+    def disp_frame(self, mode):
+        self.show_frame(mode)
+        with self.render_lock:
+            self.draw_marquees(mode)
+            self.disp_time_date(self.screen, "freesans", (255, 255, 255))
+            self.disp_staleness(self.screen)
+        self.power.dim(self.screen)
 
         # Update the display
         pygame.display.update()
 
-    def disp_current_temp(self, font_name, text_color):
+    def disp_weather(self):
+        self.disp_frame('d')
+
+    def disp_hourly(self):
+        self.disp_frame('h')
+
+    def disp_current_temp(self, surface, font_name, text_color):
         # Outside Temp
-        outside_temp_font = pygame.font.SysFont(
-            font_name, int(self.ymax * (0.5 - 0.15) * 0.6), bold=1)
+        outside_temp_font = self.get_font(
+            font_name, int(self.ymax * (0.5 - 0.15) * 0.6))
         txt = outside_temp_font.render(
             str(int(round(self.weather.temperature))), True, text_color)
         (txt_x, txt_y) = txt.get_size()
-        degree_font = pygame.font.SysFont(
-            font_name, int(self.ymax * (0.5 - 0.15) * 0.3), bold=1)
+        degree_font = self.get_font(
+            font_name, int(self.ymax * (0.5 - 0.15) * 0.3))
         degree_txt = degree_font.render(UNICODE_DEGREE, True, text_color)
         (rendered_am_pm_x, rendered_am_pm_y) = degree_txt.get_size()
         degree_letter = outside_temp_font.render(get_temperature_letter(),
@@ -609,22 +1275,26 @@ class MyDisplay:
         # Position text
         x = self.xmax * 0.27 - (txt_x * 1.02 + rendered_am_pm_x +
                                 degree_letter_x) / 2
-        self.screen.blit(txt, (x, self.ymax * 0.20))
+        surface.blit(txt, (x, self.ymax * 0.20))
         x = x + (txt_x * 1.02)
-        self.screen.blit(degree_txt, (x, self.ymax * 0.2))
+        surface.blit(degree_txt, (x, self.ymax * 0.2))
         x = x + (rendered_am_pm_x * 1.02)
-        self.screen.blit(degree_letter, (x, self.ymax * 0.2))
+        surface.blit(degree_letter, (x, self.ymax * 0.2))
 
-    def disp_time_date(self, font_name, text_color):
+    def disp_time_date(self, surface, font_name, text_color):
         # Time & Date
-        time_date_font = pygame.font.SysFont(
-            font_name, int(self.ymax * self.time_date_text_height), bold=1)
+        time_date_font = self.get_font(
+            font_name, int(self.ymax * self.time_date_text_height))
         # Small Font for Seconds
-        small_font = pygame.font.SysFont(
+        small_font = self.get_font(
             font_name,
-            int(self.ymax * self.time_date_small_text_height), bold=1)
+            int(self.ymax * self.time_date_small_text_height))
 
-        time_string = time.strftime("%a, %b %d   %I:%M", time.localtime())
+        if self.clock_seconds and self.governor.shows_seconds:
+            time_format = "%a, %b %d   %I:%M:%S"
+        else:
+            time_format = "%a, %b %d   %I:%M"
+        time_string = time.strftime(time_format, time.localtime())
         am_pm_string = time.strftime(" %p", time.localtime())
 
         rendered_time_string = time_date_font.render(time_string, True,
@@ -636,136 +1306,482 @@ class MyDisplay:
 
         full_time_string_x_position = self.xmax / 2 - (rendered_time_x +
                                                        rendered_am_pm_x) / 2
-        self.screen.blit(rendered_time_string, (full_time_string_x_position,
-                                                self.time_date_y_position))
-        self.screen.blit(rendered_am_pm_string,
-                         (full_time_string_x_position + rendered_time_x + 3,
-                          self.time_date_small_y_position))
+        surface.blit(rendered_time_string, (full_time_string_x_position,
+                                            self.time_date_y_position))
+        surface.blit(rendered_am_pm_string,
+                     (full_time_string_x_position + rendered_time_x + 3,
+                      self.time_date_small_y_position))
 
-    def draw_screen_border(self, line_color, xmin, lines):
+    def draw_screen_border(self, surface, line_color, xmin, lines):
         # Draw Screen Border
         # Top
-        pygame.draw.line(self.screen, line_color, (xmin, 0), (self.xmax, 0),
+        pygame.draw.line(surface, line_color, (xmin, 0), (self.xmax, 0),
                          lines)
         # Left
-        pygame.draw.line(self.screen, line_color, (xmin, 0),
+        pygame.draw.line(surface, line_color, (xmin, 0),
                          (xmin, self.ymax), lines)
         # Bottom
-        pygame.draw.line(self.screen, line_color, (xmin, self.ymax),
+        pygame.draw.line(surface, line_color, (xmin, self.ymax),
                          (self.xmax, self.ymax), lines)
         # Right
-        pygame.draw.line(self.screen, line_color, (self.xmax, 0),
+        pygame.draw.line(surface, line_color, (self.xmax, 0),
                          (self.xmax, self.ymax + 2), lines)
         # Bottom of top box
-        pygame.draw.line(self.screen, line_color, (xmin, self.ymax * 0.15),
+        pygame.draw.line(surface, line_color, (xmin, self.ymax * 0.15),
                          (self.xmax, self.ymax * 0.15), lines)
         # Bottom of middle box
-        pygame.draw.line(self.screen, line_color, (xmin, self.ymax * 0.5),
+        pygame.draw.line(surface, line_color, (xmin, self.ymax * 0.5),
                          (self.xmax, self.ymax * 0.5), lines)
         # Bottom row, left vertical
-        pygame.draw.line(self.screen, line_color, (self.xmax * 0.25,
-                                                   self.ymax * 0.5),
+        pygame.draw.line(surface, line_color, (self.xmax * 0.25,
+                                               self.ymax * 0.5),
                          (self.xmax * 0.25, self.ymax), lines)
         # Bottom row, center vertical
-        pygame.draw.line(self.screen, line_color, (self.xmax * 0.5,
-                                                   self.ymax * 0.15),
+        pygame.draw.line(surface, line_color, (self.xmax * 0.5,
+                                               self.ymax * 0.15),
                          (self.xmax * 0.5, self.ymax), lines)
         # Bottom row, right vertical
-        pygame.draw.line(self.screen, line_color, (self.xmax * 0.75,
-                                                   self.ymax * 0.5),
+        pygame.draw.line(surface, line_color, (self.xmax * 0.75,
+                                               self.ymax * 0.5),
                          (self.xmax * 0.75, self.ymax), lines)
 
     ####################################################################
-    def sPrint(self, text, font, x, line_number, text_color):
+    def sPrint(self, surface, text, font, x, line_number, text_color):
         rendered_font = font.render(text, True, text_color)
-        self.screen.blit(rendered_font, (x, self.ymax * 0.075 * line_number))
+        surface.blit(rendered_font, (x, self.ymax * 0.075 * line_number))
 
     ####################################################################
-    def disp_info(self, in_daylight, day_hrs, day_mins, seconds_til_daylight,
-                  delta_seconds_til_dark):
-        # Fill the screen with black
-        self.screen.fill((0, 0, 0))
+    def render_info_frame(self):
+        """ The parts of the info screen that only change with the data. """
         xmin = 10
         lines = 5
         line_color = (0, 0, 0)
         text_color = (255, 255, 255)
         font_name = "freesans"
 
+        frame = pygame.Surface(self.screen.get_size()).convert()
+        # Fill the frame with black
+        frame.fill((0, 0, 0))
+
         # Draw Screen Border
-        pygame.draw.line(self.screen, line_color,
+        pygame.draw.line(frame, line_color,
                          (xmin, 0), (self.xmax, 0), lines)
-        pygame.draw.line(self.screen, line_color,
+        pygame.draw.line(frame, line_color,
                          (xmin, 0), (xmin, self.ymax), lines)
-        pygame.draw.line(self.screen, line_color,
+        pygame.draw.line(frame, line_color,
                          (xmin, self.ymax), (self.xmax, self.ymax), lines)
-        pygame.draw.line(self.screen, line_color,
+        pygame.draw.line(frame, line_color,
                          (self.xmax, 0), (self.xmax, self.ymax), lines)
-        pygame.draw.line(self.screen, line_color,
+        pygame.draw.line(frame, line_color,
                          (xmin, self.ymax * 0.15),
                          (self.xmax, self.ymax * 0.15), lines)
 
-        time_height_large = self.time_date_text_height
-        time_height_small = self.time_date_small_text_height
+        small_font = self.get_font(
+            font_name, int(self.ymax * self.time_date_small_text_height))
 
-        # Time & Date
-        regular_font = pygame.font.SysFont(
-            font_name, int(self.ymax * time_height_large), bold=1)
-        small_font = pygame.font.SysFont(
-            font_name, int(self.ymax * time_height_small), bold=1)
-
-        hours_and_minites = time.strftime("%I:%M", time.localtime())
-        am_pm = time.strftime(" %p", time.localtime())
-
-        rendered_hours_and_minutes = regular_font.render(
-            hours_and_minites, True, text_color)
-        (tx1, ty1) = rendered_hours_and_minutes.get_size()
-        rendered_am_pm = small_font.render(am_pm, True, text_color)
-        (tx2, ty2) = rendered_am_pm.get_size()
-
-        tp = self.xmax / 2 - (tx1 + tx2) / 2
-        self.screen.blit(rendered_hours_and_minutes,
-                         (tp, self.time_date_y_position))
-        self.screen.blit(rendered_am_pm,
-                         (tp + tx1 + 3, self.time_date_small_y_position))
-
-        self.sPrint("A weather rock powered by Dark Sky", small_font,
+        self.sPrint(frame, "A weather rock powered by Dark Sky", small_font,
                     self.xmax * 0.05, 3, text_color)
 
-        self.sPrint("Sunrise: %s" % self.sunrise_string,
+        self.sPrint(frame, "Sunrise: %s" % self.sunrise_string,
                     small_font, self.xmax * 0.05, 4, text_color)
 
-        self.sPrint("Sunset:  %s" % self.sunset_string,
+        self.sPrint(frame, "Sunset:  %s" % self.sunset_string,
                     small_font, self.xmax * 0.05, 5, text_color)
 
-        text = "Daylight: %d hrs %02d min" % (day_hrs, day_mins)
-        self.sPrint(text, small_font, self.xmax * 0.05, 6, text_color)
-
-        # leaving row 7 blank
-
-        if in_daylight:
-            text = "Sunset in %d hrs %02d min" % stot(delta_seconds_til_dark)
-        else:
-            text = "Sunrise in %d hrs %02d min" % stot(seconds_til_daylight)
-        self.sPrint(text, small_font, self.xmax * 0.05, 8, text_color)
-
-        # leaving row 9 blank
+        # row 6 (daylight) and row 8 (time until sunrise or sunset) are
+        # drawn by disp_info; leaving rows 7 and 9 blank
 
         text = "Weather checked at"
-        self.sPrint(text, small_font, self.xmax * 0.05, 10, text_color)
+        self.sPrint(frame, text, small_font, self.xmax * 0.05, 10, text_color)
 
         text = "    %s" % time.strftime(
             "%I:%M:%S %p %Z on %a. %d %b %Y ",
             time.localtime(self.last_update_check))
-        self.sPrint(text, small_font, self.xmax * 0.05, 11, text_color)
+        self.sPrint(frame, text, small_font, self.xmax * 0.05, 11, text_color)
+        return frame
+
+    ####################################################################
+    def draw_outline(self, surface, line_color, xmin, lines):
+        """ Screen border and the top box, for the full width screens. """
+        for start, end in (((xmin, 0), (self.xmax, 0)),
+                           ((xmin, 0), (xmin, self.ymax)),
+                           ((xmin, self.ymax), (self.xmax, self.ymax)),
+                           ((self.xmax, 0), (self.xmax, self.ymax + 2)),
+                           ((xmin, self.ymax * 0.15),
+                            (self.xmax, self.ymax * 0.15))):
+            pygame.draw.line(surface, line_color, start, end, lines)
+
+    def draw_sparkline(self, surface, rect, series, color):
+        """
+        Plot (min, max, mean) buckets from History.series: a vertical bar
+        for each bucket's range and a line through the means.
+        """
+        buckets = [(index, bucket) for index, bucket in enumerate(series)
+                   if bucket is not None]
+        if not buckets:
+            return None
+        low = min(bucket[0] for index, bucket in buckets)
+        high = max(bucket[1] for index, bucket in buckets)
+        span = high - low
+        if not span:
+            # Flat series: draw it through the middle of the box
+            span = 2
+            low -= 1
+        x_step = rect.width / max(1, len(series) - 1)
+        band_color = tuple(component // 3 for component in color)
+
+        def y_position(value):
+            return rect.bottom - (value - low) / span * rect.height
+
+        means = []
+        for index, (bucket_min, bucket_max, mean) in buckets:
+            x = rect.left + index * x_step
+            pygame.draw.line(surface, band_color, (x, y_position(bucket_min)),
+                             (x, y_position(bucket_max)),
+                             max(1, int(x_step)))
+            means.append((x, y_position(mean)))
+        if len(means) > 1:
+            pygame.draw.lines(surface, color, False, means, 2)
+        return (min(bucket[0] for index, bucket in buckets),
+                max(bucket[1] for index, bucket in buckets))
+
+    def render_trend_frame(self):
+        """ 24 hour and 7 day sparklines of the recorded conditions. """
+        xmin = 10
+        lines = 5
+        line_color = (255, 255, 255)
+        text_color = (255, 255, 255)
+        font_name = "freesans"
+        rows = (
+            ('Temperature', 'temperature', 1, UNICODE_DEGREE,
+             (255, 160, 64)),
+            ('Humidity', 'humidity', 100, '%', (64, 160, 255)),
+            ('Wind', 'wind_speed', 1, ' ' + get_windspeed_abbreviation(),
+             (160, 255, 160)),
+            ('Pressure', 'pressure', 1, '', (220, 220, 220)),
+        )
+        spans = ((24 * 3600, 96), (7 * 24 * 3600, 84))
+
+        frame = pygame.Surface(self.screen.get_size()).convert()
+        frame.fill((0, 0, 0))
+        self.draw_outline(frame, line_color, xmin, lines)
+
+        label_font = self.get_font(font_name, int(self.ymax * 0.045))
+        small_font = self.get_font(font_name, int(self.ymax * 0.035))
+        columns = ((self.xmax * 0.26, self.xmax * 0.36),
+                   (self.xmax * 0.64, self.xmax * 0.33))
+        for (x, width), heading in zip(columns, ('Last 24 hours',
+                                                 'Last 7 days')):
+            txt = small_font.render(heading, True, text_color)
+            frame.blit(txt, (x + (width - txt.get_size()[0]) / 2,
+                             self.ymax * 0.17))
+
+        row_height = self.ymax * 0.19
+        for row, (label, field, scale, suffix, color) in enumerate(rows):
+            y = self.ymax * 0.23 + row * row_height
+            frame.blit(label_font.render(label, True, text_color),
+                       (self.xmax * 0.04, y))
+            ranges = []
+            for (x, width), (seconds, buckets) in zip(columns, spans):
+                series = [None if bucket is None else
+                          tuple(value * scale for value in bucket)
+                          for bucket in self.history.series(
+                              field, seconds, buckets,
+                              target=config.UNITS)]
+                ranges.append(self.draw_sparkline(
+                    frame, pygame.Rect(x, y + 4, width, row_height * 0.7),
+                    series, color))
+            if ranges[-1] is not None:
+                text = '{0}{2} - {1}{2}'.format(
+                    int(round(ranges[-1][0])), int(round(ranges[-1][1])),
+                    suffix)
+            else:
+                text = 'No data yet'
+            frame.blit(small_font.render(text, True, color),
+                       (self.xmax * 0.04, y + row_height * 0.4))
+        return frame
+
+    def disp_trend(self):
+        self.disp_frame('t')
+
+    def render_graph_frame(self):
+        """ Hourly temperature and chance of rain for the next 48 hours. """
+        xmin = 10
+        lines = 5
+        line_color = (255, 255, 255)
+        text_color = (255, 255, 255)
+        temp_color = (255, 160, 64)
+        rain_color = (64, 160, 255)
+        grid_color = (64, 64, 64)
+        font_name = "freesans"
+        graph = self.hourly_graph
+        rect = self.graph_rect()
+
+        frame = pygame.Surface(self.screen.get_size()).convert()
+        frame.fill((0, 0, 0))
+        self.draw_outline(frame, line_color, xmin, lines)
+
+        small_font = self.get_font(font_name, int(self.ymax * 0.035))
+        legend_x = rect.left
+        for text, color in (('Temperature', temp_color),
+                            ('Chance of rain', rain_color)):
+            txt = small_font.render(text, True, color)
+            frame.blit(txt, (legend_x, self.ymax * 0.18))
+            legend_x += txt.get_size()[0] + self.xmax * 0.05
+
+        # Grid and axis labels: degrees on the left, rain chance on the right
+        for step in range(5):
+            y = rect.bottom - rect.height * step / 4.0
+            pygame.draw.line(frame, grid_color, (rect.left, y),
+                             (rect.right, y))
+            degrees = graph['low'] + (graph['high'] - graph['low']) * \
+                step / 4.0
+            txt = small_font.render('{0}{1}'.format(
+                int(round(degrees)), UNICODE_DEGREE), True, temp_color)
+            frame.blit(txt, (rect.left - txt.get_size()[0] - 6,
+                             y - txt.get_size()[1] / 2))
+            txt = small_font.render('{0}%'.format(step * 25), True,
+                                    rain_color)
+            frame.blit(txt, (rect.right + 6, y - txt.get_size()[1] / 2))
+        for hour_time, (x, y) in zip(graph['times'], graph['temperature']):
+            hour = datetime.datetime.fromtimestamp(hour_time)
+            if hour.hour % 6:
+                continue
+            pygame.draw.line(frame, grid_color, (x, rect.top),
+                             (x, rect.bottom))
+            if hour.hour == 0:
+                label = hour.strftime('%a')
+            else:
+                label = hour.strftime('%I %p').lstrip('0')
+            txt = small_font.render(label, True, text_color)
+            frame.blit(txt, (x - txt.get_size()[0] / 2, rect.bottom + 6))
+
+        pygame.draw.aalines(frame, rain_color, False, graph['rain'])
+        pygame.draw.lines(frame, temp_color, False, graph['temperature'], 3)
+
+        # The week ahead, from Dark Sky's daily summary
+        week = self.marquees['daily']
+        week.set_text(small_font, getattr(self.weather.daily, 'summary', ''),
+                      text_color)
+        if not week.scrolling:
+            week.draw(frame)
+        return frame
+
+    def render_alert_frame(self):
+        """ Every active alert, most severe first, as much as fits. """
+        xmin = 10
+        lines = 5
+        line_color = (255, 255, 255)
+        text_color = (255, 255, 255)
+        font_name = "freesans"
+
+        frame = pygame.Surface(self.screen.get_size()).convert()
+        frame.fill((0, 0, 0))
+        self.draw_outline(frame, line_color, xmin, lines)
+
+        title_font = self.get_font(font_name, int(self.ymax * 0.055))
+        small_font = self.get_font(font_name, int(self.ymax * 0.035))
+        x = self.xmax * 0.04
+        width = self.xmax * 0.92
+        y = self.ymax * 0.18
+        if not self.alerts.active:
+            txt = title_font.render('No weather alerts.', True, text_color)
+            frame.blit(txt, ((self.xmax - txt.get_size()[0]) / 2,
+                             self.ymax * 0.5))
+            return frame
+        line_height = small_font.get_linesize()
+        for alert in self.alerts.active:
+            for line in wrap_text(title_font, alert.title, width):
+                if y + title_font.get_linesize() > self.ymax * 0.97:
+                    break
+                frame.blit(title_font.render(
+                    line, True, SEVERITY_COLORS[alert.severity]), (x, y))
+                y += title_font.get_linesize()
+            if y + line_height > self.ymax * 0.97:
+                break
+            details = []
+            if alert.expires:
+                details.append('Until ' + datetime.datetime.fromtimestamp(
+                    alert.expires).strftime('%a %I:%M %p'))
+            if alert.regions:
+                details.append(', '.join(alert.regions))
+            text = ' - '.join(details) + '\n' + alert.description
+            for line in wrap_text(small_font, text, width):
+                if y + line_height > self.ymax * 0.97:
+                    break
+                frame.blit(small_font.render(line, True, text_color), (x, y))
+                y += line_height
+            y += line_height
+        return frame
+
+    def nowcast_rect(self):
+        """ Plot area of the nowcast screen. """
+        return pygame.Rect(int(self.xmax * 0.1), int(self.ymax * 0.32),
+                           int(self.xmax * 0.8), int(self.ymax * 0.5))
+
+    def render_nowcast_frame(self):
+        """ Rain intensity for each of the next 60 minutes as a bar. """
+        xmin = 10
+        lines = 5
+        line_color = (255, 255, 255)
+        text_color = (255, 255, 255)
+        grid_color = (64, 64, 64)
+        font_name = "freesans"
+        next_hour = self.nowcast
+        rect = self.nowcast_rect()
+
+        frame = pygame.Surface(self.screen.get_size()).convert()
+        frame.fill((0, 0, 0))
+        self.draw_outline(frame, line_color, xmin, lines)
+
+        small_font = self.get_font(font_name, int(self.ymax * 0.035))
+        if next_hour is None or not len(next_hour):
+            txt = small_font.render(
+                'No minute by minute forecast for this location.', True,
+                text_color)
+            frame.blit(txt, ((self.xmax - txt.get_size()[0]) / 2,
+                             self.ymax * 0.5))
+            return frame
+        summary_font = self.get_font(font_name, int(self.ymax * 0.045))
+        frame.blit(summary_font.render(next_hour.summary, True, text_color),
+                   (rect.left, self.ymax * 0.18))
+
+        # Scale to at least moderate rain so drizzle doesn't fill the chart
+        top = max(next_hour.max_intensity, next_hour.threshold * 40)
+        unit = get_abbreviation(units_decoder(config.UNITS)['precipIntensity'])
+        for step in range(5):
+            y = rect.bottom - rect.height * step / 4.0
+            pygame.draw.line(frame, grid_color, (rect.left, y),
+                             (rect.right, y))
+            txt = small_font.render('{0:.2g}'.format(top * step / 4.0),
+                                    True, text_color)
+            frame.blit(txt, (rect.left - txt.get_size()[0] - 6,
+                             y - txt.get_size()[1] / 2))
+        txt = small_font.render(unit, True, text_color)
+        frame.blit(txt, (rect.left - txt.get_size()[0] - 6,
+                         rect.top - txt.get_size()[1] * 2))
+
+        bar_width = rect.width / float(len(next_hour))
+        for minute, (intensity, probability) in enumerate(
+                zip(next_hour.intensity, next_hour.probability)):
+            if minute % 10 == 0:
+                txt = small_font.render('+{0}'.format(minute), True,
+                                        text_color)
+                frame.blit(txt, (rect.left + minute * bar_width -
+                                 txt.get_size()[0] / 2, rect.bottom + 6))
+            height = rect.height * min(intensity / top, 1.0)
+            if height < 1:
+                continue
+            # Brighter bars for rain that is more certain
+            shade = int(96 + 159 * probability)
+            pygame.draw.rect(frame, (shade // 4, shade // 2, shade), (
+                rect.left + minute * bar_width, rect.bottom - height,
+                max(1, bar_width - 2), height))
+        return frame
+
+    def disp_nowcast(self):
+        """ The cached chart with a 'now' marker and live countdown. """
+        self.show_frame('n')
+        next_hour = self.nowcast
+        with self.render_lock:
+            if next_hour is not None and len(next_hour):
+                rect = self.nowcast_rect()
+                minute = (time.time() - next_hour.start) / 60.0
+                if 0 <= minute <= len(next_hour):
+                    x = rect.left + minute * rect.width / len(next_hour)
+                    pygame.draw.line(self.screen, (255, 255, 255),
+                                     (x, rect.top), (x, rect.bottom), 2)
+                status_font = self.get_font("freesans",
+                                            int(self.ymax * 0.045))
+                txt = status_font.render(next_hour.describe(), True,
+                                         (255, 255, 255))
+                self.screen.blit(txt, ((self.xmax - txt.get_size()[0]) / 2,
+                                       self.ymax * 0.9))
+            self.disp_time_date(self.screen, "freesans", (255, 255, 255))
+            self.disp_staleness(self.screen)
+        self.power.dim(self.screen)
+
+        # Update the display
+        pygame.display.update()
+
+    def disp_graph(self):
+        """ The cached graph with a marker for the current time. """
+        self.show_frame('g')
+        graph = self.hourly_graph
+        now = time.time()
+        if graph['start'] <= now <= graph['end']:
+            rect = self.graph_rect()
+            x = rect.left + (now - graph['start']) * graph['x_scale']
+            pygame.draw.line(self.screen, (255, 255, 255), (x, rect.top),
+                             (x, rect.bottom), 2)
+        with self.render_lock:
+            self.draw_marquees('g')
+            self.disp_time_date(self.screen, "freesans", (255, 255, 255))
+            self.disp_staleness(self.screen)
+        self.power.dim(self.screen)
 
         # Update the display
         pygame.display.update()
 
-    # Save a jpg image of the screen.
+    ####################################################################
+    def disp_info(self, in_daylight, day_hrs, day_mins, seconds_til_daylight,
+                  delta_seconds_til_dark):
+        text_color = (255, 255, 255)
+        font_name = "freesans"
+
+        self.show_frame('i')
+
+        time_height_large = self.time_date_text_height
+        time_height_small = self.time_date_small_text_height
+
+        with self.render_lock:
+            # Time & Date
+            regular_font = self.get_font(
+                font_name, int(self.ymax * time_height_large))
+            small_font = self.get_font(
+                font_name, int(self.ymax * time_height_small))
+
+            if self.clock_seconds and self.governor.shows_seconds:
+                time_format = "%I:%M:%S"
+            else:
+                time_format = "%I:%M"
+            hours_and_minites = time.strftime(time_format, time.localtime())
+            am_pm = time.strftime(" %p", time.localtime())
+
+            rendered_hours_and_minutes = regular_font.render(
+                hours_and_minites, True, text_color)
+            (tx1, ty1) = rendered_hours_and_minutes.get_size()
+            rendered_am_pm = small_font.render(am_pm, True, text_color)
+            (tx2, ty2) = rendered_am_pm.get_size()
+
+            tp = self.xmax / 2 - (tx1 + tx2) / 2
+            self.screen.blit(rendered_hours_and_minutes,
+                             (tp, self.time_date_y_position))
+            self.screen.blit(rendered_am_pm,
+                             (tp + tx1 + 3, self.time_date_small_y_position))
+
+            text = "Daylight: %d hrs %02d min" % (day_hrs, day_mins)
+            self.sPrint(self.screen, text, small_font, self.xmax * 0.05, 6,
+                        text_color)
+
+            if in_daylight:
+                text = "Sunset in %d hrs %02d min" % stot(
+                    delta_seconds_til_dark)
+            else:
+                text = "Sunrise in %d hrs %02d min" % stot(
+                    seconds_til_daylight)
+            self.sPrint(self.screen, text, small_font, self.xmax * 0.05, 8,
+                        text_color)
+            self.disp_staleness(self.screen)
+        self.power.dim(self.screen)
+
+        # Update the display
+        pygame.display.update()
+
+    # Save an image of the screen. The file is written in the background.
     ####################################################################
     def screen_cap(self):
-        pygame.image.save(self.screen, "screenshot.jpeg")
-        print("Screen capture complete.")
+        self.screen_capture.capture(self.screen)
 
 
 # Given a sunrise and sunset unix timestamp,
@@ -817,19 +1833,124 @@ def daylight(weather):
             delta_seconds_til_dark)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--profile', action='store_true',
+        default=bool(os.getenv('PIWEATHERROCK_PROFILE')),
+        help='time each draw method and get_forecast, printing statistics '
+             'periodically (or set PIWEATHERROCK_PROFILE=1)')
+    parser.add_argument(
+        '--profile-interval', type=int, default=60, metavar='SECONDS',
+        help='seconds between profile reports (default: %(default)s)')
+    parser.add_argument(
+        '--profile-frames', type=int, metavar='N',
+        default=int(os.getenv('PIWEATHERROCK_PROFILE_FRAMES', '0')),
+        help='also run the first N frames under cProfile')
+    parser.add_argument(
+        '--profile-output', default='weather.prof', metavar='FILE',
+        help='where to save cProfile data (default: %(default)s)')
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+
+# Formatting and writing log lines happens on a background thread.
+LOG_HANDLER = weatherlog.setup(
+    getattr(config, 'LOG_LEVEL', 'INFO'),
+    getattr(config, 'LOG_FILE', 'weather.log'),
+    getattr(config, 'LOG_MAX_BYTES', 1000000),
+    getattr(config, 'LOG_BACKUPS', 3),
+    getattr(config, 'LOG_SYSLOG', True),
+    getattr(config, 'LOG_SYSLOG_LEVEL', 'WARNING'),
+    getattr(config, 'LOG_CONSOLE', None),
+    getattr(config, 'LOG_RATE_LIMIT', 60))
+
 # Create an instance of the lcd display class.
 MY_DISP = MyDisplay()
 
+# Profiling wraps the instance's methods, so normal runs pay nothing.
+if ARGS.profile or ARGS.profile_frames:
+    profiler.Profiler(ARGS.profile_interval, ARGS.profile_frames,
+                       ARGS.profile_output).wrap(
+                           MY_DISP,
+                           ('disp_weather', 'disp_hourly', 'disp_info',
+                            'render_trend_frame', 'render_graph_frame',
+                            'disp_graph', 'render_nowcast_frame',
+                            'disp_nowcast', 'render_alert_frame',
+                            'disp_time_date',
+                            'disp_current_temp',
+                            'disp_summary', 'disp_umbrella_info',
+                            'display_conditions_line', 'display_subwindow',
+                            'draw_screen_border', 'get_forecast'),
+                           frame_methods=('disp_weather', 'disp_hourly',
+                                          'disp_info', 'disp_graph',
+                                          'disp_nowcast'))
+    LOG.info('Profiling enabled.')
+
+# Optional hardware buttons that act like the mode keys.
+BUTTONS = buttons.Buttons(getattr(config, 'GPIO_BUTTONS', None),
+                          getattr(config, 'GPIO_BOUNCETIME', 200))
+BUTTONS.start()
+
+# Optional HTTP endpoint with /metrics and /status for remote monitoring.
+if getattr(config, 'METRICS_PORT', 0):
+    metrics.serve(config.METRICS_PORT,
+                  getattr(config, 'METRICS_ADDRESS', ''),
+                  status=lambda: {
+                      'version': __version__,
+                      'mode': MODE,
+                      'last_update_check': MY_DISP.last_update_check,
+                      'api_calls_today': MY_DISP.scheduler.calls_today,
+                      'check_interval': MY_DISP.scheduler.interval,
+                      'fetch_state': MY_DISP.fetcher.state,
+                      'data_age': MY_DISP.data_age(),
+                      'icon_mode': MY_DISP.icons.mode,
+                      'icon_bytes': sum(MY_DISP.icons.footprint()),
+                      'rss_bytes': memwatch.rss_bytes(),
+                      'log_dropped': LOG_HANDLER.dropped,
+                      'log_suppressed': LOG_HANDLER.filters[0].suppressed,
+                  })
+    LOG.info('Serving metrics on port %d', config.METRICS_PORT)
+
+# Edits to config.py are picked up without restarting the display.
+CONFIG_WATCHER = None
+RELOAD_INTERVAL = getattr(config, 'CONFIG_RELOAD_INTERVAL', 5)
+if RELOAD_INTERVAL:
+    CONFIG_WATCHER = configwatch.ConfigWatcher(
+        config, RELOAD_INTERVAL, validate_config)
+    CONFIG_WATCHER.start()
+
+# Optional check for memory creeping up over weeks of running.
+MEMORY = None
+if getattr(config, 'MEMORY_CHECK_INTERVAL', 300) and (
+        getattr(config, 'MEMORY_RSS_LIMIT', 0) or
+        getattr(config, 'MEMORY_DETAIL', False)):
+    MEMORY = memwatch.MemoryWatchdog(
+        getattr(config, 'MEMORY_CHECK_INTERVAL', 300),
+        getattr(config, 'MEMORY_RSS_LIMIT', 0) * 1000000,
+        getattr(config, 'MEMORY_LIMIT_ACTION', 'warn'),
+        getattr(config, 'MEMORY_DETAIL', False),
+        getattr(config, 'MEMORY_TOP', 10),
+        mode=lambda: MODE)
+    MEMORY.start()
+
 RUNNING = True             # Stay running while True
+RESTART = False            # Start over in a new process on the way out
 SECONDS = 0                # Seconds Placeholder to pace display.
-# Display timeout to automatically switch back to weather dispaly.
+# Seconds spent outside weather display, to automatically switch back.
 NON_WEATHER_TIMEOUT = 0
-# Switch to info periodically to prevent screen burn
+# Seconds in weather display, to switch to info periodically to prevent
+# screen burn
 PERIODIC_INFO_ACTIVATION = 0
+LAST_MODE = None
+LAST_LOOP = time.monotonic()
 
 # Loads data from darksky.net into class variables.
-if MY_DISP.get_forecast() is False:
-    print('Error: no data from darksky.net.')
+with STARTUP.phase('first fetch'):
+    FIRST_FETCH = MY_DISP.get_forecast(force=True)
+if FIRST_FETCH is False:
+    LOG.error('No data from darksky.net.')
     RUNNING = False
 
 
@@ -842,6 +1963,10 @@ while RUNNING:
             if ((event.key == pygame.K_KP_ENTER) or (event.key == pygame.K_q)):
                 RUNNING = False
 
+            # Any other key only wakes a sleeping display.
+            elif MY_DISP.power.wake():
+                MY_DISP.governor.force()
+
             # On 'd' key, set mode to 'weather'.
             elif event.key == pygame.K_d:
                 MODE = 'd'
@@ -852,6 +1977,12 @@ while RUNNING:
             elif event.key == pygame.K_s:
                 MY_DISP.screen_cap()
 
+            # On 'a' key, set mode to 'alerts'.
+            elif event.key == pygame.K_a:
+                MODE = 'a'
+                NON_WEATHER_TIMEOUT = 0
+                PERIODIC_INFO_ACTIVATION = 0
+
             # On 'i' key, set mode to 'info'.
             elif event.key == pygame.K_i:
                 MODE = 'i'
@@ -864,85 +1995,243 @@ while RUNNING:
                 NON_WEATHER_TIMEOUT = 0
                 PERIODIC_INFO_ACTIVATION = 0
 
+            # on 'g' key, set mode to 'graph'
+            elif event.key == pygame.K_g:
+                MODE = 'g'
+                NON_WEATHER_TIMEOUT = 0
+                PERIODIC_INFO_ACTIVATION = 0
+
+            # on 'n' key, set mode to 'nowcast' (if enabled)
+            elif event.key == pygame.K_n and MY_DISP.nowcast_enabled:
+                MODE = 'n'
+                NON_WEATHER_TIMEOUT = 0
+                PERIODIC_INFO_ACTIVATION = 0
+
+            # on 't' key, set mode to 'trends' (if history is kept)
+            elif event.key == pygame.K_t and MY_DISP.history is not None:
+                MODE = 't'
+                NON_WEATHER_TIMEOUT = 0
+                PERIODIC_INFO_ACTIVATION = 0
+
+    # The loop rate varies with the frame rate, so time the timeouts.
+    LOOP_START = time.monotonic()
+    LOOP_SECONDS = LOOP_START - LAST_LOOP
+    LAST_LOOP = LOOP_START
+
     # Automatically switch back to weather display after a couple minutes.
     if MODE not in ('d', 'h'):
         PERIODIC_INFO_ACTIVATION = 0
-        NON_WEATHER_TIMEOUT += 1
-        # Five minute timeout at 100ms loop rate.
-        if NON_WEATHER_TIMEOUT > 3000:
+        NON_WEATHER_TIMEOUT += LOOP_SECONDS
+        # Five minute timeout.
+        if NON_WEATHER_TIMEOUT > 300:
             MODE = 'd'
-            syslog.syslog("Switched to weather mode")
+            LOG.info('Switched to weather mode',
+                     extra=weatherlog.fields(mode=MODE))
     else:
         NON_WEATHER_TIMEOUT = 0
-        PERIODIC_INFO_ACTIVATION += 1
+        PERIODIC_INFO_ACTIVATION += LOOP_SECONDS
         CURR_MIN_INT = int(datetime.datetime.now().strftime("%M"))
-        # 15 minute timeout at 100ms loop rate
-        if PERIODIC_INFO_ACTIVATION > 9000:
+        # 15 minute timeout
+        if PERIODIC_INFO_ACTIVATION > 900:
             MODE = 'i'
-            syslog.syslog("Switched to info mode")
-        elif PERIODIC_INFO_ACTIVATION > 600 and CURR_MIN_INT % 2 == 0:
+            LOG.info('Switched to info mode',
+                     extra=weatherlog.fields(mode=MODE))
+        elif PERIODIC_INFO_ACTIVATION > 60 and CURR_MIN_INT % 2 == 0:
             MODE = 'h'
-        elif PERIODIC_INFO_ACTIVATION > 600:
+        elif PERIODIC_INFO_ACTIVATION > 60:
             MODE = 'd'
 
+    # Settings edited in config.py are switched to between frames. The
+    # file is checked and loaded on the watcher's thread; this is a dict.
+    if CONFIG_WATCHER is not None:
+        CONFIG_CHANGES = CONFIG_WATCHER.take()
+        if CONFIG_CHANGES:
+            if not MY_DISP.apply_config(CONFIG_CHANGES):
+                CONFIG_WATCHER.reject(CONFIG_CHANGES)
+            elif MY_DISP.refetch:
+                MY_DISP.get_forecast()
+
+    # Memory is sampled on the watchdog's thread. Past the RSS ceiling the
+    # display restarts itself if MEMORY_LIMIT_ACTION says so.
+    if MEMORY is not None:
+        MEMORY_SAMPLE = MEMORY.take()
+        if MEMORY_SAMPLE:
+            RSS_BYTES.set(MEMORY_SAMPLE['rss'])
+            if 'surfaces' in MEMORY_SAMPLE:
+                LIVE_SURFACES.set(MEMORY_SAMPLE['surfaces'],
+                                  mode=MEMORY_SAMPLE['mode'])
+            if MEMORY_SAMPLE['over_limit'] and MEMORY.action == 'restart':
+                LOG.warning('Restarting to free memory.',
+                            extra=weatherlog.fields(
+                                rss=MEMORY_SAMPLE['rss']))
+                RESTART = True
+                RUNNING = False
+
+    # A new severe weather alert interrupts whatever is on screen. The
+    # alerts are sorted out when the forecast arrives; this is just a flag.
+    if MY_DISP.alerts.take() and getattr(config, 'ALERT_INTERRUPT', True):
+        MODE = 'a'
+        NON_WEATHER_TIMEOUT = 0
+        PERIODIC_INFO_ACTIVATION = 0
+        MY_DISP.power.wake()
+        LOG.info('Switched to alert mode',
+                 extra=weatherlog.fields(mode=MODE))
+
+    # Draw straight away on a mode change, whatever the frame rate.
+    if MODE != LAST_MODE:
+        MY_DISP.governor.force()
+        LAST_MODE = MODE
+    # Scrolling text needs more frames than the clock to move smoothly.
+    MY_DISP.governor.hold(MY_DISP.marquee_fps if MY_DISP.scrolling(MODE)
+                          else 0)
+    # Nothing is drawn while the display is asleep.
+    FRAME_DUE = MY_DISP.governor.due() and not MY_DISP.power.blanked
+    SECONDS = time.localtime().tm_sec
+    # Asleep, the loop only wakes once a second and can miss second 0, so
+    # the schedule alone decides; get_forecast() only fetches when due.
+    FETCH_DUE = SECONDS == 0 or MY_DISP.power.blanked
+
     # Daily Weather Display Mode
     if MODE == 'd':
-        # Update / Refresh the display after each second.
-        if SECONDS != time.localtime().tm_sec:
-            SECONDS = time.localtime().tm_sec
+        # Update / Refresh the display when the frame governor says so.
+        if FRAME_DUE:
+            frame_start = time.monotonic()
             MY_DISP.disp_weather()
+            frame_cost = (time.monotonic() - frame_start -
+                          MY_DISP.take_paused())
+            FRAME_SECONDS.observe(frame_cost, mode='d')
+            MY_DISP.governor.frame_done(frame_cost)
             # ser.write("Weather\r\n")
-        # Once the screen is updated, we have a full second to get the weather.
+        # Once the screen is updated, we have time to get the weather.
         # Once per minute, update the weather from the net.
-        if SECONDS == 0:
-            try:
-                MY_DISP.get_forecast()
-            except ValueError:  # includes simplejson.decoder.JSONDecodeError
-                print("Decoding JSON has failed", sys.exc_info()[0])
-            except BaseException:
-                print("Unexpected error:", sys.exc_info()[0])
+        if FETCH_DUE:
+            MY_DISP.get_forecast()
     # Hourly Weather Display Mode
     elif MODE == 'h':
-        # Update / Refresh the display after each second.
-        if SECONDS != time.localtime().tm_sec:
-            SECONDS = time.localtime().tm_sec
+        # Update / Refresh the display when the frame governor says so.
+        if FRAME_DUE:
+            frame_start = time.monotonic()
             MY_DISP.disp_hourly()
-        # Once the screen is updated, we have a full second to get the weather.
+            frame_cost = (time.monotonic() - frame_start -
+                          MY_DISP.take_paused())
+            FRAME_SECONDS.observe(frame_cost, mode='h')
+            MY_DISP.governor.frame_done(frame_cost)
+        # Once the screen is updated, we have time to get the weather.
         # Once per minute, update the weather from the net.
-        if SECONDS == 0:
-            try:
-                MY_DISP.get_forecast()
-            except ValueError:  # includes simplejson.decoder.JSONDecodeError
-                print("Decoding JSON has failed", sys.exc_info()[0])
-            except BaseException:
-                print("Unexpected error:", sys.exc_info()[0])
+        if FETCH_DUE:
+            MY_DISP.get_forecast()
     # Info Screen Display Mode
     elif MODE == 'i':
-        # Pace the screen updates to once per second.
-        if SECONDS != time.localtime().tm_sec:
-            SECONDS = time.localtime().tm_sec
-
+        # Pace the screen updates with the frame governor.
+        if FRAME_DUE:
             (inDaylight, dayHrs, dayMins, seconds_til_daylight,
              delta_seconds_til_dark) = daylight(MY_DISP.weather)
 
             # Extra info display.
+            frame_start = time.monotonic()
             MY_DISP.disp_info(inDaylight, dayHrs, dayMins,
                               seconds_til_daylight,
                               delta_seconds_til_dark)
+            frame_cost = (time.monotonic() - frame_start -
+                          MY_DISP.take_paused())
+            FRAME_SECONDS.observe(frame_cost, mode='i')
+            MY_DISP.governor.frame_done(frame_cost)
         # Refresh the weather data once per minute.
-        if int(SECONDS) == 0:
-            try:
-                MY_DISP.get_forecast()
-            except ValueError:  # includes simplejson.decoder.JSONDecodeError
-                print("Decoding JSON has failed", sys.exc_info()[0])
-            except BaseException:
-                print("Unexpected error:", sys.exc_info()[0])
+        if FETCH_DUE:
+            MY_DISP.get_forecast()
+    # Hourly Graph Display Mode
+    elif MODE == 'g':
+        if FRAME_DUE:
+            frame_start = time.monotonic()
+            MY_DISP.disp_graph()
+            frame_cost = (time.monotonic() - frame_start -
+                          MY_DISP.take_paused())
+            FRAME_SECONDS.observe(frame_cost, mode='g')
+            MY_DISP.governor.frame_done(frame_cost)
+        # Refresh the weather data once per minute.
+        if FETCH_DUE:
+            MY_DISP.get_forecast()
+    # Alert Display Mode
+    elif MODE == 'a':
+        if FRAME_DUE:
+            frame_start = time.monotonic()
+            MY_DISP.disp_frame('a')
+            frame_cost = (time.monotonic() - frame_start -
+                          MY_DISP.take_paused())
+            FRAME_SECONDS.observe(frame_cost, mode='a')
+            MY_DISP.governor.frame_done(frame_cost)
+        # Refresh the weather data once per minute.
+        if FETCH_DUE:
+            MY_DISP.get_forecast()
+    # Nowcast Display Mode
+    elif MODE == 'n':
+        if FRAME_DUE:
+            frame_start = time.monotonic()
+            MY_DISP.disp_nowcast()
+            frame_cost = (time.monotonic() - frame_start -
+                          MY_DISP.take_paused())
+            FRAME_SECONDS.observe(frame_cost, mode='n')
+            MY_DISP.governor.frame_done(frame_cost)
+        # Refresh the weather data once per minute.
+        if FETCH_DUE:
+            MY_DISP.get_forecast()
+    # Trend Display Mode
+    elif MODE == 't':
+        if FRAME_DUE:
+            frame_start = time.monotonic()
+            MY_DISP.disp_trend()
+            frame_cost = (time.monotonic() - frame_start -
+                          MY_DISP.take_paused())
+            FRAME_SECONDS.observe(frame_cost, mode='t')
+            MY_DISP.governor.frame_done(frame_cost)
+        # Refresh the weather data once per minute.
+        if FETCH_DUE:
+            MY_DISP.get_forecast()
+
+    if FRAME_DUE and not STARTUP.reported:
+        STARTUP.record('first frame', frame_cost)
+        STARTUP_SECONDS.set(STARTUP.report(), phase='total')
+        for phase, phase_seconds in STARTUP.phases:
+            STARTUP_SECONDS.set(phase_seconds, phase=phase)
 
     (inDaylight, dayHrs, dayMins, seconds_til_daylight,
      delta_seconds_til_dark) = daylight(MY_DISP.weather)
 
-    # Loop timer.
-    pygame.time.wait(100)
+    # Put the display to sleep or wake it up on schedule.
+    if MY_DISP.power.update(MY_DISP.screen, inDaylight):
+        MY_DISP.governor.force()
+
+    # Periodic screenshots for remote monitoring, if enabled.
+    MY_DISP.screen_capture.periodic(MY_DISP.screen)
+
+    for SHOWN in ('d', 'h', 'i', 'g', 'n', 't', 'a'):
+        CURRENT_MODE.set(1 if SHOWN == MODE else 0, mode=SHOWN)
+
+    # Loop timer. A button press cuts the wait short so it is handled now.
+    if MY_DISP.power.blanked:
+        # Nothing to draw, so block until a key or button press arrives,
+        # checking the schedule once a second.
+        EVENT = pygame.event.wait(1000)
+        if EVENT.type != pygame.NOEVENT:
+            pygame.event.post(EVENT)
+        LOOP_WAKEUPS.inc(reason='asleep')
+    elif BUTTONS.wait(min(0.1, MY_DISP.governor.time_to_next_frame())):
+        LOOP_WAKEUPS.inc(reason='button')
+    else:
+        LOOP_WAKEUPS.inc(reason='timer')
 
 
+BUTTONS.stop()
+if CONFIG_WATCHER is not None:
+    CONFIG_WATCHER.stop()
+if MEMORY is not None:
+    MEMORY.stop()
 pygame.quit()
+
+if RESTART:
+    # A clean process with the same arguments. exec skips atexit, so the
+    # history and the log are closed here.
+    if MY_DISP.history is not None:
+        MY_DISP.history.close()
+    LOG_HANDLER.listener.stop()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Logging that never makes the display wait. Records are put on a queue by
+the thread that logs them and formatted and written by a background
+thread, to the console, a rotating log file and syslog.
+
+    LOG = logging.getLogger(__name__)
+    LOG.warning('Forecast fetch failed: %s', e,
+                extra=weatherlog.fields(error=type(e).__name__))
+
+Fields passed like this are appended to the line as key=value pairs.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import syslog
+import threading
+
+FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+def fields(**values):
+    """ `extra` for a log call, adding structured fields to the record. """
+    return {'fields': values}
+
+
+class FieldFormatter(logging.Formatter):
+    """ Appends a record's fields to the message as key=value pairs. """
+
+    def format(self, record):
+        text = super().format(record)
+        values = getattr(record, 'fields', None)
+        if values:
+            text += ' ' + ' '.join(
+                '{0}={1}'.format(key, value)
+                for key, value in sorted(values.items()))
+        return text
+
+
+class RateLimit(logging.Filter):
+    """
+    Lets a message through at most once every `interval` seconds. Messages
+    are the same if they come from the same logger at the same level with
+    the same format string and arguments, counting exceptions as the same
+    if they are of the same type, so a failing request repeated every few
+    seconds is logged once a minute. The number of copies dropped is added
+    to the next one let through as the `suppressed` field.
+    """
+
+    def __init__(self, interval=60):
+        super().__init__()
+        self.interval = interval
+        self.last = {}
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def key(self, record):
+        args = record.args if isinstance(record.args, tuple) else ()
+        return (record.name, record.levelno, record.msg, tuple(
+            arg if isinstance(arg, (str, int, float)) else type(arg).__name__
+            for arg in args))
+
+    def filter(self, record):
+        if not self.interval:
+            return True
+        key = self.key(record)
+        with self.lock:
+            last, dropped = self.last.get(key, (None, 0))
+            if last is not None and record.created - last < self.interval:
+                self.last[key] = (last, dropped + 1)
+                self.suppressed += 1
+                return False
+            self.last[key] = (record.created, 0)
+            if len(self.last) > 256:
+                # Forget messages that would be let through anyway
+                self.last = dict(
+                    (old_key, value) for old_key, value in self.last.items()
+                    if record.created - value[0] < self.interval)
+        if dropped:
+            record.fields = dict(getattr(record, 'fields', None) or {},
+                                 suppressed=dropped)
+        return True
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records as they are, leaving the formatting to the listener
+    thread, and drops them rather than wait if the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SyslogHandler(logging.Handler):
+    """ Sends records to syslog with the matching priority. """
+
+    PRIORITIES = {
+        logging.DEBUG: syslog.LOG_DEBUG,
+        logging.INFO: syslog.LOG_INFO,
+        logging.WARNING: syslog.LOG_WARNING,
+        logging.ERROR: syslog.LOG_ERR,
+        logging.CRITICAL: syslog.LOG_CRIT,
+    }
+
+    def emit(self, record):
+        try:
+            syslog.syslog(self.PRIORITIES.get(record.levelno, syslog.LOG_INFO),
+                          self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def setup(level='INFO', path=None, max_bytes=1000000, backups=3,
+          use_syslog=True, syslog_level='WARNING', console=None,
+          rate_limit=60, queue_size=1000):
+    """
+    Send all logging through a queue to the configured outputs. `console`
+    None logs to stdout only when it is a terminal, so a service whose
+    output is redirected doesn't fill a file that is never rotated.
+    Returns the QueueHandler, whose `dropped` and `filters[0].suppressed`
+    count records that were lost; its `listener` writes out the queue when
+    stopped.
+    """
+    formatter = FieldFormatter(FORMAT)
+    handlers = []
+    if console is None:
+        console = sys.stdout.isatty()
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    if path:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups))
+    if use_syslog:
+        syslog_handler = SyslogHandler(syslog_level)
+        handlers.append(syslog_handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    if use_syslog:
+        # syslog adds its own timestamp
+        syslog_handler.setFormatter(FieldFormatter(
+            '%(levelname)s %(name)s: %(message)s'))
+
+    log_queue = queue.Queue(queue_size)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimit(rate_limit))
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    queue_handler.listener = listener
+    # Write out whatever is still queued on the way out
+    atexit.register(listener.stop)
+    return queue_handler